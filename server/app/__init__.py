@@ -1,18 +1,40 @@
 """
 Flask application factory and configuration.
 """
-from flask import Flask, request, send_from_directory
+from flask import Flask, abort, jsonify, request
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_jwt_extended import JWTManager
+from app.jobs import JobQueue
+from app.caching import AccountCache, ImageCache, ModelCatalog, PromptCache, ResponseCache, SingleFlight
+from app.breakers import ProviderHealth
+from app.clients import ProviderClients
+from app.passwords import PasswordHasher
+from app.ratelimit import RateLimiter, parse_limit
+from app.storage import BlobStore
+from app.images import DERIVATIVE_SIZES, ensure_derivative, negotiate_format
+from app.uploads import SERVE_MODES, send_upload
 import os
 from datetime import timedelta
+from werkzeug.security import safe_join
 
 # Initialize extensions
 db = SQLAlchemy()
 migrate = Migrate()
 jwt = JWTManager()
+job_queue = JobQueue()
+image_cache = ImageCache()
+image_flights = SingleFlight()
+prompt_cache = PromptCache()
+response_cache = ResponseCache()
+provider_clients = ProviderClients()
+provider_health = ProviderHealth()
+model_catalog = ModelCatalog()
+account_cache = AccountCache()
+password_hasher = PasswordHasher()
+rate_limiter = RateLimiter()
+blob_store = BlobStore()
 
 UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'uploads')
 
@@ -28,6 +50,8 @@ def create_app(config_name='development'):
         Flask application instance
     """
     app = Flask(__name__)
+    from app.forms import BodyLimitRequest
+    app.request_class = BodyLimitRequest
     
     # Load configuration from environment
     app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv(
@@ -42,6 +66,73 @@ def create_app(config_name='development'):
     app.config['GROQ_API_KEY'] = os.getenv('GROQ_API_KEY', '')
     app.config['HF_TOKEN'] = os.getenv('HF_TOKEN', '')
     app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+    app.config['UPLOADS_SERVE_MODE'] = os.getenv('UPLOADS_SERVE_MODE', 'direct')
+    app.config['UPLOADS_ACCEL_PREFIX'] = os.getenv('UPLOADS_ACCEL_PREFIX', '/protected-uploads')
+    app.config['UPLOADS_MAX_AGE'] = int(os.getenv('UPLOADS_MAX_AGE', 3600))
+    if app.config['UPLOADS_SERVE_MODE'] not in SERVE_MODES:
+        raise ValueError(f"UPLOADS_SERVE_MODE must be one of {SERVE_MODES}")
+    app.config['USE_X_SENDFILE'] = app.config['UPLOADS_SERVE_MODE'] == 'x-sendfile'
+    app.config['PAGE_SIZE_DEFAULT'] = int(os.getenv('PAGE_SIZE_DEFAULT', 50))
+    app.config['PAGE_SIZE_MAX'] = int(os.getenv('PAGE_SIZE_MAX', 100))
+    app.config['STORAGE_BACKEND'] = os.getenv('STORAGE_BACKEND', 'local')
+    app.config['IMAGE_DERIVATIVES_EAGER'] = os.getenv('IMAGE_DERIVATIVES_EAGER', 'False').lower() == 'true'
+    app.config['IMAGE_DERIVATIVE_QUALITY'] = int(os.getenv('IMAGE_DERIVATIVE_QUALITY', 80))
+    # Request bodies above this are rejected with 413 before they are read
+    app.config['MAX_CONTENT_LENGTH'] = int(os.getenv('MAX_CONTENT_LENGTH', 25 * 1024 * 1024))
+    app.config['ARCHIVE_MAX_CONTENT_LENGTH'] = int(os.getenv('ARCHIVE_MAX_CONTENT_LENGTH', 512 * 1024 * 1024))
+    app.config['INPUT_IMAGE_MAX_BYTES'] = int(os.getenv('INPUT_IMAGE_MAX_BYTES', 10 * 1024 * 1024))
+    app.config['INPUT_IMAGE_MAX_EDGE'] = int(os.getenv('INPUT_IMAGE_MAX_EDGE', 1536))
+    app.config['JOB_BACKEND'] = os.getenv('JOB_BACKEND', 'thread')
+    app.config['JOB_STORE'] = os.getenv('JOB_STORE', 'memory')
+    app.config['JOB_WORKERS'] = int(os.getenv('JOB_WORKERS', 8))
+    app.config['JOB_MAX_PENDING'] = int(os.getenv('JOB_MAX_PENDING', 500))
+    app.config['JOB_RESULT_TTL'] = int(os.getenv('JOB_RESULT_TTL', 3600))
+    app.config['IMAGE_CACHE_ENABLED'] = os.getenv('IMAGE_CACHE_ENABLED', 'True').lower() == 'true'
+    app.config['IMAGE_CACHE_MAX_ENTRIES'] = int(os.getenv('IMAGE_CACHE_MAX_ENTRIES', 1024))
+    app.config['IMAGE_CACHE_MAX_BYTES'] = int(os.getenv('IMAGE_CACHE_MAX_BYTES', 512 * 1024 * 1024))
+    app.config['IMAGE_CACHE_TTL'] = int(os.getenv('IMAGE_CACHE_TTL', 7 * 24 * 3600))
+    app.config['PROMPT_CACHE_ENABLED'] = os.getenv('PROMPT_CACHE_ENABLED', 'True').lower() == 'true'
+    app.config['PROMPT_CACHE_MAX_ENTRIES'] = int(os.getenv('PROMPT_CACHE_MAX_ENTRIES', 2048))
+    app.config['PROMPT_CACHE_TTL'] = int(os.getenv('PROMPT_CACHE_TTL', 30 * 24 * 3600))
+    app.config['PROMPT_CACHE_PATH'] = os.getenv('PROMPT_CACHE_PATH', '')
+    app.config['TEXT_CACHE_ENABLED'] = os.getenv('TEXT_CACHE_ENABLED', 'True').lower() == 'true'
+    app.config['TEXT_CACHE_MAX_ENTRIES'] = int(os.getenv('TEXT_CACHE_MAX_ENTRIES', 5000))
+    app.config['TEXT_CACHE_TTL'] = int(os.getenv('TEXT_CACHE_TTL', 24 * 3600))
+    app.config['TEXT_CACHE_SIMILARITY'] = float(os.getenv('TEXT_CACHE_SIMILARITY', 0.85))
+    app.config['SINGLE_FLIGHT_ENABLED'] = os.getenv('SINGLE_FLIGHT_ENABLED', 'True').lower() == 'true'
+    app.config['PASSWORD_HASH_METHOD'] = os.getenv('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+    app.config['PASSWORD_SALT_LENGTH'] = int(os.getenv('PASSWORD_SALT_LENGTH', 16))
+    app.config['PASSWORD_HASH_WORKERS'] = int(os.getenv('PASSWORD_HASH_WORKERS', 0)) or None
+    app.config['ACCOUNT_CACHE_ENABLED'] = os.getenv('ACCOUNT_CACHE_ENABLED', 'True').lower() == 'true'
+    app.config['ACCOUNT_CACHE_MAX_ENTRIES'] = int(os.getenv('ACCOUNT_CACHE_MAX_ENTRIES', 10000))
+    app.config['ACCOUNT_CACHE_TTL'] = int(os.getenv('ACCOUNT_CACHE_TTL', 300))
+    app.config['RATE_LIMIT_ENABLED'] = os.getenv('RATE_LIMIT_ENABLED', 'True').lower() == 'true'
+    app.config['RATE_LIMIT_BACKEND'] = os.getenv('RATE_LIMIT_BACKEND', 'memory')
+    app.config['RATE_LIMIT_REDIS_URL'] = os.getenv('RATE_LIMIT_REDIS_URL', 'redis://localhost:6379/0')
+    app.config['RATE_LIMITS'] = {
+        'individual': parse_limit(os.getenv('RATE_LIMIT_INDIVIDUAL', '10:5')),
+        'business': parse_limit(os.getenv('RATE_LIMIT_BUSINESS', '30:10')),
+        'student': parse_limit(os.getenv('RATE_LIMIT_STUDENT', '6:3')),
+    }
+    app.config['PROVIDER_POOL_CONNECTIONS'] = int(os.getenv('PROVIDER_POOL_CONNECTIONS', 10))
+    app.config['PROVIDER_POOL_MAXSIZE'] = int(os.getenv('PROVIDER_POOL_MAXSIZE', 20))
+    app.config['PROVIDER_MAX_RETRIES'] = int(os.getenv('PROVIDER_MAX_RETRIES', 2))
+    app.config['PROVIDER_RETRY_BACKOFF'] = float(os.getenv('PROVIDER_RETRY_BACKOFF', 0.5))
+    app.config['PROVIDER_CONNECT_TIMEOUT'] = float(os.getenv('PROVIDER_CONNECT_TIMEOUT', 5))
+    app.config['PROVIDER_READ_TIMEOUT'] = float(os.getenv('PROVIDER_READ_TIMEOUT', 60))
+    app.config['BREAKER_FAILURE_THRESHOLD'] = int(os.getenv('BREAKER_FAILURE_THRESHOLD', 5))
+    app.config['BREAKER_RESET_TIMEOUT'] = float(os.getenv('BREAKER_RESET_TIMEOUT', 30))
+    app.config['BREAKER_SLOW_CALL_SECONDS'] = float(os.getenv('BREAKER_SLOW_CALL_SECONDS', 45))
+    app.config['BREAKER_WINDOW'] = int(os.getenv('BREAKER_WINDOW', 100))
+    app.config['BATCH_MAX_VARIANTS'] = int(os.getenv('BATCH_MAX_VARIANTS', 8))
+    app.config['BATCH_MAX_CONCURRENCY'] = int(os.getenv('BATCH_MAX_CONCURRENCY', 4))
+    app.config['SSE_KEEPALIVE'] = int(os.getenv('SSE_KEEPALIVE', 15))
+    app.config['MODEL_CATALOG_TTL'] = int(os.getenv('MODEL_CATALOG_TTL', 300))
+    app.config['MODEL_CATALOG_RETRY'] = int(os.getenv('MODEL_CATALOG_RETRY', 30))
+    app.config['RACE_MODELS'] = [m.strip() for m in os.getenv(
+        'RACE_MODELS', 'pollinations,subnp-turbo,subnp-flux,gemini-enhanced').split(',') if m.strip()]
+    app.config['RACE_WIDTH'] = int(os.getenv('RACE_WIDTH', 3))
+    app.config['MODEL_CATALOG_WARM'] = os.getenv('MODEL_CATALOG_WARM', 'True').lower() == 'true'
     
     # Enable CORS with proper configuration
     cors_config = {
@@ -57,6 +148,15 @@ def create_app(config_name='development'):
     db.init_app(app)
     migrate.init_app(app, db)
     jwt.init_app(app)
+    job_queue.init_app(app)
+    image_cache.init_app(app)
+    image_flights.init_app(app)
+    prompt_cache.init_app(app)
+    response_cache.init_app(app)
+    provider_clients.init_app(app)
+    provider_health.init_app(app)
+    password_hasher.init_app(app)
+    blob_store.init_app(app)
     
     # Register blueprints
     from app.routes.auth import auth_bp
@@ -68,6 +168,7 @@ def create_app(config_name='development'):
     from app.routes.ai import ai_bp
     from app.routes.conversations import conversations_bp
     from app.routes.styles import styles_bp
+    from app.routes.archive import archive_bp
     
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(accounts_bp, url_prefix='/api/accounts')
@@ -78,7 +179,22 @@ def create_app(config_name='development'):
     app.register_blueprint(ai_bp, url_prefix='/api/ai')
     app.register_blueprint(conversations_bp)
     app.register_blueprint(styles_bp)
+    app.register_blueprint(archive_bp)
+
+    from app.routes.auth import load_account_snapshot
+    account_cache.init_app(app, loader=load_account_snapshot)
+    rate_limiter.init_app(app, account_loader=account_cache.get)
+
+    # Load the provider model catalog in the background so the first
+    # /api/ai/models request is already answered from memory
+    from app.routes.ai import fetch_subnp_models
+    model_catalog.init_app(app, loader=fetch_subnp_models)
+    if app.config['MODEL_CATALOG_WARM']:
+        model_catalog.warm()
     
+    from app.cli import register_commands
+    register_commands(app)
+
     # Ensure upload directories exist
     os.makedirs(UPLOAD_FOLDER, exist_ok=True)
     os.makedirs(os.path.join(UPLOAD_FOLDER, 'designs'), exist_ok=True)
@@ -86,7 +202,38 @@ def create_app(config_name='development'):
     # Serve uploaded files
     @app.route('/api/uploads/<path:filename>', methods=['GET'])
     def uploaded_file(filename):
-        return send_from_directory(UPLOAD_FOLDER, filename)
+        # ?size=thumb|medium serves a downsized WebP/JPEG variant, rendered on first use
+        size = request.args.get('size')
+        if size and size != 'original':
+            if size not in DERIVATIVE_SIZES:
+                return {'error': f'Unknown size: {size}'}, 400
+            source = safe_join(app.config['UPLOAD_FOLDER'], filename)
+            if source is None or not os.path.isfile(source):
+                abort(404)
+            fmt = negotiate_format(request.headers.get('Accept'))
+            try:
+                derived = ensure_derivative(app.config['UPLOAD_FOLDER'], filename, size, fmt,
+                                            app.config['IMAGE_DERIVATIVE_QUALITY'])
+            except OSError:
+                derived = None  # not a raster image (e.g. SVG); fall back to the original
+            if derived:
+                response = send_upload(derived)
+                response.vary.add('Accept')
+                return response
+
+        return send_upload(filename)
+
+    @app.before_request
+    def enforce_body_limit():
+        # Views marked with app.forms.body_limit get their own limit (BodyLimitRequest)
+        limit = request.max_content_length
+        if limit is not None and request.content_length is not None and request.content_length > limit:
+            abort(413)
+
+    @app.errorhandler(413)
+    def request_too_large(e):
+        limit = request.max_content_length
+        return jsonify({'error': f'Request body exceeds {limit // (1024 * 1024)} MB'}), 413
 
     # Health check endpoint
     @app.route('/api/health', methods=['GET'])
@@ -0,0 +1,63 @@
+"""
+Streaming ZIP writer for archive downloads.
+
+``stream_zip`` yields the archive chunk by chunk while members are still
+being produced, so a response can be sent with flat memory no matter how
+many rows or files go into it.
+"""
+import io
+import zipfile
+
+CHUNK_SIZE = 64 * 1024
+
+
+class _ChunkBuffer(io.RawIOBase):
+    """Write-only, unseekable sink that hands written bytes back to the generator."""
+
+    def __init__(self):
+        self._chunks = bytearray()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks += data
+        return len(data)
+
+    def pending(self):
+        return len(self._chunks)
+
+    def drain(self):
+        data = bytes(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_file(fileobj, chunk_size=CHUNK_SIZE):
+    """Read ``fileobj`` in chunks and close it afterwards."""
+    with fileobj:
+        while True:
+            chunk = fileobj.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+
+def stream_zip(members, compression=zipfile.ZIP_DEFLATED):
+    """
+    Yield a ZIP archive built from ``members``, an iterable of
+    ``(name, chunks)`` pairs where ``chunks`` is an iterable of bytes.
+
+    Members are consumed lazily, so a later member's contents may depend on
+    what an earlier one produced.
+    """
+    buffer = _ChunkBuffer()
+    with zipfile.ZipFile(buffer, 'w', compression=compression) as zf:
+        for name, chunks in members:
+            with zf.open(name, 'w', force_zip64=True) as member:
+                for chunk in chunks:
+                    member.write(chunk)
+                    if buffer.pending() >= CHUNK_SIZE:
+                        yield buffer.drain()
+            yield buffer.drain()
+    yield buffer.drain()
@@ -0,0 +1,150 @@
+"""
+Per-provider circuit breakers and the health scoreboard built from them.
+
+Each image provider call records its outcome and latency. After
+BREAKER_FAILURE_THRESHOLD consecutive failures (errors, or calls slower than
+BREAKER_SLOW_CALL_SECONDS) the breaker opens and calls fail fast instead of
+waiting out the provider timeout. After BREAKER_RESET_TIMEOUT seconds one
+trial call is let through (half-open): success closes the breaker, failure
+opens it again.
+"""
+import math
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    # Nearest-rank percentile
+    index = max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+class CircuitBreaker:
+    """Closed/open/half-open breaker with a window of recent call latencies."""
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30.0, slow_call_seconds=None, window=100):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.slow_call_seconds = slow_call_seconds
+        self._calls = deque(maxlen=window)  # (latency seconds, ok)
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_started = None
+        self._lock = threading.Lock()
+        self.updated_at = None
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self):
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            return HALF_OPEN
+        return self._state
+
+    def allow(self):
+        """True if a call may go to the provider now."""
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return True
+            if state == OPEN:
+                return False
+            # Half-open: one trial at a time; a trial that never reported
+            # back is abandoned after another reset period
+            now = time.monotonic()
+            if self._trial_started is None or now - self._trial_started >= self.reset_timeout:
+                self._trial_started = now
+                return True
+            return False
+
+    def retry_after(self):
+        """Seconds until the next trial call is allowed (0 when closed)."""
+        with self._lock:
+            if self._state != OPEN:
+                return 0
+            return max(0, int(self.reset_timeout - (time.monotonic() - self._opened_at)) + 1)
+
+    def record(self, ok, latency):
+        slow = self.slow_call_seconds is not None and latency > self.slow_call_seconds
+        failed = not ok or slow
+        with self._lock:
+            self._calls.append((latency, ok))
+            self.updated_at = datetime.now(timezone.utc).replace(microsecond=0)
+            trial = self._trial_started is not None
+            self._trial_started = None
+            if not failed:
+                self._failures = 0
+                self._state = CLOSED
+                return
+            self._failures += 1
+            if trial or self._failures >= self.failure_threshold:
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+
+    def snapshot(self):
+        with self._lock:
+            state = self._current_state()
+            latencies = sorted(latency for latency, _ in self._calls)
+            errors = sum(1 for _, ok in self._calls if not ok)
+            calls = len(self._calls)
+        p50 = _percentile(latencies, 50)
+        p95 = _percentile(latencies, 95)
+        return {
+            'state': state,
+            'available': state != OPEN,
+            'recent_calls': calls,
+            'error_rate': round(errors / calls, 3) if calls else None,
+            'p50_ms': round(p50 * 1000) if p50 is not None else None,
+            'p95_ms': round(p95 * 1000) if p95 is not None else None,
+        }
+
+
+class ProviderHealth:
+    """Flask extension holding one CircuitBreaker per provider."""
+
+    def __init__(self, app=None):
+        self._breakers = {}
+        self._settings = {}
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self._settings = {
+            'failure_threshold': app.config.get('BREAKER_FAILURE_THRESHOLD', 5),
+            'reset_timeout': app.config.get('BREAKER_RESET_TIMEOUT', 30.0),
+            'slow_call_seconds': app.config.get('BREAKER_SLOW_CALL_SECONDS') or None,
+            'window': app.config.get('BREAKER_WINDOW', 100),
+        }
+        with self._lock:
+            self._breakers.clear()
+        app.extensions['provider_health'] = self
+
+    def breaker(self, name):
+        with self._lock:
+            if name not in self._breakers:
+                self._breakers[name] = CircuitBreaker(name, **self._settings)
+            return self._breakers[name]
+
+    def scoreboard(self):
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {name: breaker.snapshot() for name, breaker in breakers.items()}
+
+    def updated_at(self):
+        """Time of the most recent recorded call, or None."""
+        with self._lock:
+            stamps = [b.updated_at for b in self._breakers.values() if b.updated_at]
+        return max(stamps) if stamps else None
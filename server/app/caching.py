@@ -0,0 +1,626 @@
+"""
+In-process caches shared by the routes.
+"""
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from datetime import datetime, timezone
+
+
+class TTLCache:
+    """Thread-safe LRU mapping with optional max age, byte budget and hit/miss counters."""
+
+    def __init__(self, max_entries=1024, ttl=None, max_bytes=None, sizeof=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof or (lambda value: 0)
+        self._data = OrderedDict()  # key -> (value, stored_at, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def configure(self, max_entries=None, ttl=None, max_bytes=None):
+        with self._lock:
+            if max_entries is not None:
+                self.max_entries = max_entries
+            self.ttl = ttl
+            self.max_bytes = max_bytes
+            self._evict()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return default
+            value, stored_at, size = item
+            if self.ttl and time.time() - stored_at > self.ttl:
+                self._remove(key)
+                self.evictions += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, stored_at=None):
+        size = self._sizeof(value)
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (value, stored_at or time.time(), size)
+            self._bytes += size
+            self._evict()
+
+    def pop(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            return self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def items(self):
+        """``(key, value, stored_at)`` triples, least recently used first."""
+        with self._lock:
+            return [(key, value, stored_at) for key, (value, stored_at, _) in self._data.items()]
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._data),
+            'bytes': self._bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def _remove(self, key):
+        value, _, size = self._data.pop(key)
+        self._bytes -= size
+        return value
+
+    def _evict(self):
+        if self.ttl:
+            cutoff = time.time() - self.ttl
+            while self._data:
+                oldest_key, (_, stored_at, _) = next(iter(self._data.items()))
+                if stored_at >= cutoff:
+                    break
+                self._remove(oldest_key)
+                self.evictions += 1
+        while self._data and (
+            len(self._data) > self.max_entries
+            or (self.max_bytes and self._bytes > self.max_bytes)
+        ):
+            self._remove(next(iter(self._data)))
+            self.evictions += 1
+
+
+class ImageCache:
+    """
+    Maps (model, final prompt, input image hash) to an already generated image
+    under UPLOAD_FOLDER, so identical requests skip the provider round trip.
+
+    Eviction only forgets the mapping: the file itself may be referenced by
+    chat history and stays on disk.
+    """
+
+    def __init__(self, app=None):
+        self.enabled = True
+        self._entries = TTLCache(sizeof=lambda entry: entry[1])
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('IMAGE_CACHE_ENABLED', True)
+        self._entries.configure(
+            max_entries=app.config.get('IMAGE_CACHE_MAX_ENTRIES', 1024),
+            ttl=app.config.get('IMAGE_CACHE_TTL') or None,
+            max_bytes=app.config.get('IMAGE_CACHE_MAX_BYTES') or None,
+        )
+        app.extensions['image_cache'] = self
+
+    @staticmethod
+    def make_key(model, final_prompt, input_image_bytes=None):
+        input_hash = hashlib.sha256(input_image_bytes).hexdigest() if input_image_bytes else ''
+        raw = '\x1f'.join([model or '', final_prompt or '', input_hash])
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def lookup(self, key, upload_folder):
+        """Return the cached path relative to ``upload_folder``, or None."""
+        if not self.enabled:
+            return None
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        relpath, _ = entry
+        if not os.path.exists(os.path.join(upload_folder, relpath)):
+            self._entries.pop(key)
+            return None
+        return relpath
+
+    def store(self, key, relpath, size):
+        if self.enabled:
+            self._entries.set(key, (relpath, size))
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        return dict(self._entries.stats(), enabled=self.enabled)
+
+
+class PromptCache:
+    """
+    Memoized prompt enhancements keyed on the normalized prompt text and the
+    params the enhancement depends on, so repeat requests skip the LLM hop.
+
+    With PROMPT_CACHE_PATH set, entries are written to that JSON file after
+    each store and loaded again at startup.
+    """
+
+    def __init__(self, app=None):
+        self.enabled = True
+        self.path = None
+        self._entries = TTLCache()
+        self._save_lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('PROMPT_CACHE_ENABLED', True)
+        self.path = app.config.get('PROMPT_CACHE_PATH') or None
+        self._entries.configure(
+            max_entries=app.config.get('PROMPT_CACHE_MAX_ENTRIES', 2048),
+            ttl=app.config.get('PROMPT_CACHE_TTL') or None,
+        )
+        self._entries.clear()
+        if self.enabled and self.path:
+            self._load()
+        app.extensions['prompt_cache'] = self
+
+    @staticmethod
+    def make_key(*parts):
+        """Case-, whitespace- and trailing-punctuation-insensitive key over ``parts``."""
+        normalized = [re.sub(r'\s+', ' ', str(part or '')).strip().rstrip('.!?,;').lower() for part in parts]
+        return hashlib.sha256('\x1f'.join(normalized).encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        return self._entries.get(key) if self.enabled else None
+
+    def store(self, key, text):
+        if not self.enabled:
+            return
+        self._entries.set(key, text)
+        if self.path:
+            self._save()
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        return dict(self._entries.stats(), enabled=self.enabled, persistent=bool(self.path))
+
+    def _load(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                entries = json.load(f)
+            loaded = [(str(key), str(text), float(stored_at)) for key, text, stored_at in entries]
+        except FileNotFoundError:
+            return
+        except (OSError, TypeError, ValueError) as e:
+            # Unreadable or not a list of [key, text, stored_at]: start empty
+            print(f"Prompt cache: ignoring unreadable {self.path}: {e}")
+            return
+        for key, text, stored_at in loaded:
+            self._entries.set(key, text, stored_at)
+
+    def _save(self):
+        with self._save_lock:
+            # Unique per writer: other worker processes may save at the same time
+            tmp_path = f"{self.path}.{uuid.uuid4().hex}.tmp"
+            try:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(self._entries.items(), f)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                print(f"Prompt cache: could not write {self.path}: {e}")
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+
+class ResponseCache:
+    """
+    Text replies keyed per model on the prompt, with two lookup tiers:
+
+    exact     the normalized prompt (case, whitespace, trailing punctuation)
+              was answered before
+    similar   a past prompt for the same model has a TF-IDF cosine similarity
+              of at least ``threshold`` over character trigrams
+
+    Candidates for the similarity tier come from an inverted index of
+    trigrams, read for the query's rarest trigrams only: a prompt sharing
+    none of them cannot reach the threshold, so common trigrams never pull
+    the whole index into scoring. A threshold of 0 turns the similarity
+    tier off.
+    """
+
+    NGRAM = 3
+
+    def __init__(self, app=None):
+        self.enabled = True
+        self.max_entries = 5000
+        self.ttl = None
+        self.threshold = 0.85
+        self._entries = OrderedDict()  # key -> (model, grams, reply, stored_at)
+        self._postings = {}  # model -> {gram: set of keys}
+        self._counts = Counter()  # model -> entries
+        self._lock = threading.Lock()
+        self.exact_hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('TEXT_CACHE_ENABLED', True)
+        self.max_entries = app.config.get('TEXT_CACHE_MAX_ENTRIES', 5000)
+        self.ttl = app.config.get('TEXT_CACHE_TTL') or None
+        self.threshold = app.config.get('TEXT_CACHE_SIMILARITY', 0.85)
+        self.clear()
+        app.extensions['response_cache'] = self
+
+    @staticmethod
+    def normalize(prompt):
+        return re.sub(r'\s+', ' ', prompt or '').strip().rstrip('.!?,;').lower()
+
+    @classmethod
+    def ngrams(cls, text):
+        padded = f" {re.sub(r'[^a-z0-9 ]+', '', text)} "
+        return Counter(padded[i:i + cls.NGRAM] for i in range(len(padded) - cls.NGRAM + 1))
+
+    @staticmethod
+    def _key(model, text):
+        return hashlib.sha256(f"{model}\x1f{text}".encode('utf-8')).hexdigest()
+
+    def lookup(self, model, prompt):
+        """
+        Cached reply for ``prompt`` under ``model``.
+
+        Returns:
+            (reply, match) tuple; match is 'exact', 'similar' or None on a miss
+        """
+        if not self.enabled:
+            return None, None
+        text = self.normalize(prompt)
+        key = self._key(model, text)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry):
+                self._remove(key)
+                self.evictions += 1
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.exact_hits += 1
+                return entry[2], 'exact'
+            if self.threshold > 0:
+                best_key = self._most_similar(model, self.ngrams(text))
+                if best_key is not None:
+                    self._entries.move_to_end(best_key)
+                    self.similar_hits += 1
+                    return self._entries[best_key][2], 'similar'
+            self.misses += 1
+        return None, None
+
+    def store(self, model, prompt, reply):
+        if not self.enabled or not reply:
+            return
+        text = self.normalize(prompt)
+        key = self._key(model, text)
+        grams = self.ngrams(text)
+        with self._lock:
+            self._expire()
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (model, grams, reply, time.time())
+            self._counts[model] += 1
+            postings = self._postings.setdefault(model, {})
+            for gram in grams:
+                postings.setdefault(gram, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._postings.clear()
+            self._counts.clear()
+
+    def stats(self):
+        with self._lock:
+            hits = self.exact_hits + self.similar_hits
+            lookups = hits + self.misses
+            return {
+                'enabled': self.enabled,
+                'entries': len(self._entries),
+                'exact_hits': self.exact_hits,
+                'similar_hits': self.similar_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(hits / lookups, 4) if lookups else 0.0,
+                'similarity_threshold': self.threshold,
+            }
+
+    def _most_similar(self, model, query):
+        """Key of the best entry scoring at least ``threshold``, or None."""
+        postings = self._postings.get(model)
+        if not postings or not query:
+            return None
+        total = self._counts[model]
+
+        def idf(gram):
+            # Smoothed so grams unseen in the index still get a weight
+            return math.log((1 + total) / (1 + len(postings.get(gram, ())))) + 1
+
+        weights = {gram: count * idf(gram) for gram, count in query.items()}
+        query_norm = math.sqrt(sum(w * w for w in weights.values()))
+
+        # Prefix filter: once the grams not yet read carry less than
+        # ``threshold`` of the query's norm, an entry matching none of the
+        # grams read so far cannot reach the threshold
+        candidates = set()
+        remaining = query_norm ** 2
+        for gram in sorted(weights, key=weights.get, reverse=True):
+            if math.sqrt(max(remaining, 0.0)) < self.threshold * query_norm:
+                break
+            candidates.update(postings.get(gram, ()))
+            remaining -= weights[gram] ** 2
+
+        best_key, best_score = None, self.threshold
+        for key in candidates:
+            entry = self._entries[key]
+            if self._expired(entry):
+                continue
+            grams = entry[1]
+            dot = sum(weights[gram] * count * idf(gram) for gram, count in grams.items() if gram in weights)
+            norm = math.sqrt(sum((count * idf(gram)) ** 2 for gram, count in grams.items()))
+            score = dot / (query_norm * norm) if norm else 0.0
+            if score >= best_score:
+                best_key, best_score = key, score
+        return best_key
+
+    def _expired(self, entry):
+        return bool(self.ttl) and time.time() - entry[3] > self.ttl
+
+    def _expire(self):
+        if not self.ttl:
+            return
+        for key in [k for k, entry in self._entries.items() if self._expired(entry)]:
+            self._remove(key)
+            self.evictions += 1
+
+    def _remove(self, key):
+        model, grams, _, _ = self._entries.pop(key)
+        self._counts[model] -= 1
+        postings = self._postings.get(model, {})
+        for gram in grams:
+            keys = postings.get(gram)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del postings[gram]
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key: the first caller runs the
+    function and callers arriving while it is in flight wait for its result
+    (or exception) instead of repeating the work. Nothing is kept once the
+    call returns; repeat requests after that are the ImageCache's job.
+    """
+
+    def __init__(self, app=None):
+        self.enabled = True
+        self._flights = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.shared = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('SINGLE_FLIGHT_ENABLED', True)
+        app.extensions['image_flights'] = self
+
+    def do(self, key, fn):
+        """
+        Run ``fn()`` once per in-flight ``key``.
+
+        Returns:
+            (result, shared) tuple; shared is True when another caller's call was reused
+        """
+        if not self.enabled:
+            return fn(), False
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.leaders += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result, True
+
+        try:
+            flight.result = fn()
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.result, False
+
+    def stats(self):
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'in_flight': len(self._flights),
+                'leaders': self.leaders,
+                'shared': self.shared,
+            }
+
+
+class AccountCache:
+    """
+    Serialized Account snapshots keyed by id, so token verification and
+    profile reads are answered from memory instead of the database.
+
+    Routes that change or delete an Account call invalidate() after their
+    commit. The cache is per process: other workers may serve the previous
+    snapshot for up to ACCOUNT_CACHE_TTL seconds.
+    """
+
+    def __init__(self, app=None, loader=None):
+        self.enabled = True
+        self.loader = loader
+        self._entries = TTLCache()
+        self._generation = 0
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app, loader)
+
+    def init_app(self, app, loader=None):
+        if loader is not None:
+            self.loader = loader
+        self.enabled = app.config.get('ACCOUNT_CACHE_ENABLED', True)
+        self._entries.configure(
+            max_entries=app.config.get('ACCOUNT_CACHE_MAX_ENTRIES', 10000),
+            ttl=app.config.get('ACCOUNT_CACHE_TTL') or None,
+        )
+        app.extensions['account_cache'] = self
+
+    def get(self, account_id):
+        """Return the account's ``to_dict()`` snapshot, or None if it does not exist."""
+        if self.enabled:
+            snapshot = self._entries.get(account_id)
+            if snapshot is not None:
+                return dict(snapshot)
+
+        generation = self._generation
+        snapshot = self.loader(account_id)
+        if snapshot is not None and self.enabled:
+            with self._lock:
+                # Skip the store if an invalidation raced with the load
+                if generation == self._generation:
+                    self._entries.set(account_id, snapshot)
+        return dict(snapshot) if snapshot is not None else None
+
+    def invalidate(self, account_id):
+        with self._lock:
+            self._generation += 1
+            self._entries.pop(account_id)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def stats(self):
+        return dict(self._entries.stats(), enabled=self.enabled)
+
+
+class ModelCatalog:
+    """
+    Provider model list held in memory and refreshed in the background
+    (stale-while-revalidate), so listing models never waits on the provider.
+    """
+
+    def __init__(self, app=None, loader=None):
+        self.loader = loader
+        self.ttl = 300
+        self.retry_after = 30
+        self._items = None
+        self._fetched_at = None
+        self._due_at = 0.0
+        self._refreshing = False
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app, loader)
+
+    def init_app(self, app, loader=None):
+        if loader is not None:
+            self.loader = loader
+        self.ttl = app.config.get('MODEL_CATALOG_TTL', 300)
+        self.retry_after = app.config.get('MODEL_CATALOG_RETRY', 30)
+        app.extensions['model_catalog'] = self
+
+    def get(self):
+        """
+        Return ``(items, fetched_at)`` without blocking; a background refresh
+        is started once the entry is due. ``items`` is None until the first
+        successful load.
+        """
+        if time.monotonic() >= self._due_at:
+            self.refresh_async()
+        return self._items, self._fetched_at
+
+    def refresh(self):
+        """Load the catalog synchronously, keeping the previous copy on failure."""
+        try:
+            items = self.loader()
+        except Exception as e:
+            print(f"Model catalog refresh failed: {e}")
+            items = None
+        with self._lock:
+            if items is not None:
+                self._items = items
+                self._fetched_at = datetime.now(timezone.utc).replace(microsecond=0)
+                self._due_at = time.monotonic() + self.ttl
+            else:
+                self._due_at = time.monotonic() + self.retry_after
+            self._refreshing = False
+
+    def refresh_async(self):
+        with self._lock:
+            if self._refreshing or self.loader is None:
+                return
+            self._refreshing = True
+        threading.Thread(target=self.refresh, name='model-catalog-refresh', daemon=True).start()
+
+    def warm(self):
+        """Start loading the catalog, e.g. at app startup."""
+        self.refresh_async()
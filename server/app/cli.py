@@ -0,0 +1,339 @@
+"""
+Flask CLI commands for maintenance and benchmarking.
+
+Run with ``flask --app run <command>``.
+"""
+import os
+import time
+from datetime import datetime, timedelta
+import click
+
+
+def _time_per_call(fn, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations
+
+
+def _explain(conn, statement):
+    """Return the database's query plan for ``statement`` as text."""
+    compiled = statement.compile(dialect=conn.dialect, compile_kwargs={'render_postcompile': True})
+    params = compiled.params
+    if conn.dialect.name == 'sqlite':
+        params = {k: v.isoformat(' ') if isinstance(v, datetime) else v for k, v in params.items()}
+        prefix = 'EXPLAIN QUERY PLAN '
+    else:
+        prefix = 'EXPLAIN '
+    if compiled.positional:
+        params = tuple(params[name] for name in compiled.positiontup)
+    rows = conn.exec_driver_sql(prefix + str(compiled), params).fetchall()
+    return '\n'.join(' '.join(str(col) for col in row) for row in rows)
+
+
+def _seed_explain_data(rows):
+    """Insert one synthetic account with ``rows`` rows per table; caller rolls back."""
+    from app import db
+    from app.models import Account, ChatMessage, Conversation, Design, GownDesign, SavedStyle
+
+    account = Account(email=f'explain-{time.time_ns()}@example.invalid', password_hash='-')
+    db.session.add(account)
+    db.session.flush()
+    start = datetime.utcnow() - timedelta(days=rows)
+    conversations = []
+    for i in range(rows):
+        ts = start + timedelta(hours=i)
+        conv = Conversation(account_id=account.id, title=f'c{i}', created_at=ts, updated_at=ts)
+        conversations.append(conv)
+        db.session.add_all([
+            conv,
+            GownDesign(account_id=account.id, name=f'g{i}', created_at=ts, updated_at=ts),
+            Design(user_id=account.id, name=f'd{i}', created_at=ts, updated_at=ts),
+            SavedStyle(account_id=account.id, name=f's{i}', created_at=ts),
+        ])
+    db.session.flush()
+    for i, conv in enumerate(conversations):
+        for j in range(3):
+            db.session.add(ChatMessage(conversation_id=conv.id, sender_role='user', content='m',
+                                       created_at=conv.created_at + timedelta(minutes=j)))
+    db.session.flush()
+    return account.id, [c.id for c in conversations[:50]], start + timedelta(hours=rows // 2)
+
+
+def _hot_queries(account_id, conversation_ids, midpoint):
+    """(label, expected index, query) for each per-account access path."""
+    from sqlalchemy import func
+    from app import db
+    from app.models import ChatMessage, Conversation, Design, GownDesign, SavedStyle
+    from app.pagination import encode_cursor, keyset_query
+
+    cursor = encode_cursor(midpoint, 'ffffffff')
+    return [
+        ('gown designs, first page', 'ix_gown_designs_account_created',
+         keyset_query(GownDesign.query.filter_by(account_id=account_id), GownDesign.created_at, GownDesign.id)),
+        ('gown designs, cursor page', 'ix_gown_designs_account_created',
+         keyset_query(GownDesign.query.filter_by(account_id=account_id), GownDesign.created_at, GownDesign.id, cursor)),
+        ('designs', 'ix_designs_user_created',
+         keyset_query(Design.query.filter_by(user_id=account_id), Design.created_at, Design.id, cursor)),
+        ('conversations', 'ix_conversations_account_updated',
+         keyset_query(Conversation.query.filter_by(account_id=account_id), Conversation.updated_at, Conversation.id, cursor)),
+        ('saved styles', 'ix_saved_styles_account_created',
+         keyset_query(SavedStyle.query.filter_by(account_id=account_id), SavedStyle.created_at, SavedStyle.id, cursor)),
+        ('message counts', 'ix_chat_messages_conversation_created',
+         db.session.query(ChatMessage.conversation_id, func.count(ChatMessage.id))
+         .filter(ChatMessage.conversation_id.in_(conversation_ids))
+         .group_by(ChatMessage.conversation_id)),
+        ('conversation messages', 'ix_chat_messages_conversation_created',
+         keyset_query(ChatMessage.query.filter_by(conversation_id=conversation_ids[0]),
+                      ChatMessage.created_at, ChatMessage.id)),
+    ]
+
+
+# Statements GET /api/conversations may issue per page: the keyset page and
+# one grouped message-count query
+LIST_CONVERSATIONS_MAX_QUERIES = 2
+
+
+class _QueryCounter:
+    """Counts SQL statements sent through ``engine`` while active."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+    def __enter__(self):
+        from sqlalchemy import event
+        event.listen(self.engine, 'before_cursor_execute', self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        from sqlalchemy import event
+        event.remove(self.engine, 'before_cursor_execute', self._on_execute)
+
+
+def _seed_conversations(conversations, messages_each):
+    """Commit one synthetic account with chats of ``messages_each`` messages; returns its id."""
+    from app import db
+    from app.models import Account, ChatMessage, Conversation
+
+    account = Account(email=f'query-count-{time.time_ns()}@example.invalid', password_hash='-')
+    db.session.add(account)
+    db.session.flush()
+    for i in range(conversations):
+        conv = Conversation(account_id=account.id, title=f'c{i}')
+        db.session.add(conv)
+        db.session.flush()
+        db.session.add_all([ChatMessage(conversation_id=conv.id, sender_role='user', content='m')
+                            for _ in range(messages_each)])
+    db.session.commit()
+    return account.id
+
+
+def _delete_account_rows(account_id):
+    from app import db
+    from app.models import Account, ChatMessage, Conversation
+
+    conv_ids = db.session.query(Conversation.id).filter_by(account_id=account_id)
+    ChatMessage.query.filter(ChatMessage.conversation_id.in_(conv_ids)).delete(synchronize_session=False)
+    Conversation.query.filter_by(account_id=account_id).delete(synchronize_session=False)
+    Account.query.filter_by(id=account_id).delete(synchronize_session=False)
+    db.session.commit()
+
+
+def register_commands(app):
+    """Attach the CLI commands to ``app``."""
+
+    @app.cli.command('bench-clients')
+    @click.option('--iterations', default=200, show_default=True, help='Calls per measurement.')
+    def bench_clients(iterations):
+        """Per-request SDK client overhead: construct-per-call vs shared registry."""
+        from app.clients import ProviderClients
+
+        def construct_genai():
+            from google import genai
+            genai.Client(api_key='bench-key')
+
+        def construct_groq():
+            import groq
+            groq.Groq(api_key='bench-key')
+
+        registry = ProviderClients(app)
+        cases = [
+            ('genai', construct_genai, lambda: registry.genai('bench-key')),
+            ('groq', construct_groq, lambda: registry.groq('bench-key')),
+        ]
+        for name, construct, shared in cases:
+            try:
+                first = _time_per_call(construct, 1)
+            except ImportError as e:
+                click.echo(f"{name}: skipped ({e})")
+                continue
+            before = _time_per_call(construct, iterations)
+            shared()  # the one-off construction every worker still pays
+            after = _time_per_call(shared, iterations)
+            click.echo(
+                f"{name}: first call {first * 1e3:.1f} ms, "
+                f"per call before {before * 1e6:.1f} us, after {after * 1e6:.2f} us "
+                f"({before / after:.0f}x)"
+            )
+
+    @app.cli.command('explain-indexes')
+    @click.option('--seed', default=500, show_default=True, help='Rows per table to seed; rolled back afterwards.')
+    @click.option('--create-all', is_flag=True, help='Create missing tables first (scratch SQLite databases).')
+    @click.option('--verbose', is_flag=True, help='Print every plan, not only failures.')
+    def explain_indexes(seed, create_all, verbose):
+        """EXPLAIN the hot per-account queries and check each uses its index."""
+        from app import db
+
+        if create_all:
+            db.create_all()
+        failures = 0
+        try:
+            account_id, conversation_ids, midpoint = _seed_explain_data(max(seed, 1))
+            conn = db.session.connection()
+            conn.exec_driver_sql('ANALYZE')
+            if conn.dialect.name == 'postgresql':
+                # Tiny seeded tables favour sequential scans; make the planner
+                # show whether the index is usable at all.
+                conn.exec_driver_sql('SET LOCAL enable_seqscan = off')
+            for label, index, query in _hot_queries(account_id, conversation_ids, midpoint):
+                plan = _explain(conn, query.statement)
+                ok = index in plan
+                failures += not ok
+                click.echo(f"{'ok  ' if ok else 'FAIL'} {label}: expects {index}")
+                if verbose or not ok:
+                    click.echo('     ' + plan.replace('\n', '\n     '))
+        finally:
+            db.session.rollback()
+        if failures:
+            raise click.ClickException(f'{failures} queries do not use their index')
+
+    @app.cli.command('check-query-counts')
+    @click.option('--conversations', default=20, show_default=True, help='Conversations per seeded account.')
+    @click.option('--create-all', is_flag=True, help='Create missing tables first (scratch SQLite databases).')
+    def check_query_counts(conversations, create_all):
+        """
+        Regression check for the conversation listing N+1: the number of SQL
+        statements must not grow with the number of messages per conversation.
+        Seeded rows are committed and deleted again afterwards.
+        """
+        from flask_jwt_extended import create_access_token
+        from app import db
+
+        if create_all:
+            db.create_all()
+        client = app.test_client()
+        counts = {}
+        for messages_each in (1, 25):
+            account_id = _seed_conversations(conversations, messages_each)
+            try:
+                headers = {'Authorization': f'Bearer {create_access_token(identity=account_id)}'}
+                with _QueryCounter(db.engine) as counter:
+                    response = client.get(f'/api/conversations?limit={conversations}', headers=headers)
+                listed = len(response.get_json().get('conversations', []))
+                if response.status_code != 200 or listed != conversations:
+                    raise click.ClickException(f'Listing failed: HTTP {response.status_code}, {listed} conversations')
+                counts[messages_each] = counter.count
+                click.echo(f"{conversations} conversations x {messages_each} messages: {counter.count} queries")
+            finally:
+                _delete_account_rows(account_id)
+
+        if len(set(counts.values())) > 1:
+            raise click.ClickException('Query count grows with conversation size')
+        if max(counts.values()) > LIST_CONVERSATIONS_MAX_QUERIES:
+            raise click.ClickException(
+                f'Conversation listing issues {max(counts.values())} queries, '
+                f'budget is {LIST_CONVERSATIONS_MAX_QUERIES}')
+        click.echo('ok')
+
+    @app.cli.command('bench-passwords')
+    @click.option('--method', 'methods', multiple=True,
+                  help='Werkzeug method to measure (repeatable); defaults to PASSWORD_HASH_METHOD.')
+    @click.option('--seconds', default=2.0, show_default=True, help='Duration of each measurement.')
+    @click.option('--threads', default=0, help='Concurrent hashing threads (default: one per core).')
+    def bench_passwords(methods, seconds, threads):
+        """Password hashes/sec on one core and across a thread pool."""
+        from concurrent.futures import ThreadPoolExecutor
+        from werkzeug.security import generate_password_hash
+
+        cores = os.cpu_count() or 1
+        threads = threads or cores
+
+        def hashes_per_second(method, workers):
+            deadline = time.perf_counter() + seconds
+
+            def worker():
+                count = 0
+                while time.perf_counter() < deadline:
+                    generate_password_hash('bench-password', method)
+                    count += 1
+                return count
+
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                total = sum(pool.map(lambda _: worker(), range(workers)))
+            return total / (time.perf_counter() - start)
+
+        for method in methods or [app.config['PASSWORD_HASH_METHOD']]:
+            single = hashes_per_second(method, 1)
+            pooled = hashes_per_second(method, threads)
+            click.echo(
+                f"{method}: {1e3 / single:.1f} ms/hash, {single:.1f} hashes/s on one core, "
+                f"{pooled:.1f} hashes/s on {threads} threads ({pooled / threads:.1f} per thread, {cores} cores)"
+            )
+
+    @app.cli.command('bench-uploads')
+    @click.option('--requests', 'total', default=2000, show_default=True, help='Requests per mode.')
+    @click.option('--concurrency', default=8, show_default=True, help='Client threads.')
+    @click.option('--size-kb', default=512, show_default=True, help='Size of the sample file.')
+    def bench_uploads(total, concurrency, size_kb):
+        """In-process /api/uploads throughput: full sends vs 304 revalidation vs proxy hand-off."""
+        import hashlib
+        import shutil
+        import tempfile
+        from concurrent.futures import ThreadPoolExecutor
+
+        data = os.urandom(size_kb * 1024)
+        relpath = f"designs/{hashlib.sha256(data).hexdigest()}.png"
+        folder = tempfile.mkdtemp(prefix='bench-uploads-')
+        os.makedirs(os.path.join(folder, 'designs'))
+        with open(os.path.join(folder, relpath), 'wb') as f:
+            f.write(data)
+
+        saved = {key: app.config[key] for key in ('UPLOAD_FOLDER', 'UPLOADS_SERVE_MODE', 'USE_X_SENDFILE')}
+        app.config['UPLOAD_FOLDER'] = folder
+        url = f'/api/uploads/{relpath}'
+        try:
+            etag = app.test_client().get(url).headers['ETag']
+            cases = [
+                ('direct, full body', 'direct', {}),
+                ('direct, If-None-Match', 'direct', {'If-None-Match': etag}),
+                ('x-sendfile hand-off', 'x-sendfile', {}),
+                ('x-accel hand-off', 'x-accel', {}),
+            ]
+            for label, mode, headers in cases:
+                app.config['UPLOADS_SERVE_MODE'] = mode
+                app.config['USE_X_SENDFILE'] = mode == 'x-sendfile'
+
+                def worker(count):
+                    client = app.test_client()
+                    sent = 0
+                    for _ in range(count):
+                        response = client.get(url, headers=headers)
+                        sent += len(response.get_data())
+                        response.close()
+                    return sent
+
+                per_thread = [total // concurrency] * concurrency
+                start = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                    sent = sum(pool.map(worker, per_thread))
+                elapsed = time.perf_counter() - start
+                done = sum(per_thread)
+                click.echo(f"{label:24} {done / elapsed:8.0f} req/s  {sent / elapsed / 2**20:8.1f} MiB/s from the worker")
+        finally:
+            app.config.update(saved)
+            shutil.rmtree(folder, ignore_errors=True)
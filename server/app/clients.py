@@ -0,0 +1,109 @@
+"""
+Shared clients for external AI providers.
+
+Sessions and SDK clients are created once per worker process and reused
+across requests so provider calls skip the SDK import, client setup, DNS
+lookup, TCP connect and TLS handshake after the first request.
+"""
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+class ProviderClients:
+    """Registry of pooled HTTP sessions and lazily built SDK clients."""
+
+    def __init__(self, app=None):
+        self._sessions = {}
+        self._sdk_clients = {}
+        self._lock = threading.Lock()
+        self.pool_connections = 10
+        self.pool_maxsize = 20
+        self.max_retries = 2
+        self.backoff_factor = 0.5
+        self.connect_timeout = 5
+        self.read_timeout = 60
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.pool_connections = app.config.get('PROVIDER_POOL_CONNECTIONS', 10)
+        self.pool_maxsize = app.config.get('PROVIDER_POOL_MAXSIZE', 20)
+        self.max_retries = app.config.get('PROVIDER_MAX_RETRIES', 2)
+        self.backoff_factor = app.config.get('PROVIDER_RETRY_BACKOFF', 0.5)
+        self.connect_timeout = app.config.get('PROVIDER_CONNECT_TIMEOUT', 5)
+        self.read_timeout = app.config.get('PROVIDER_READ_TIMEOUT', 60)
+        self.close()
+        app.extensions['provider_clients'] = self
+
+    def session(self, name='default'):
+        """Return the pooled session for ``name``, creating it on first use."""
+        session = self._sessions.get(name)
+        if session is not None:
+            return session
+        with self._lock:
+            session = self._sessions.get(name)
+            if session is None:
+                session = self._build_session()
+                self._sessions[name] = session
+            return session
+
+    def genai(self, api_key):
+        """Return the shared google-genai client for ``api_key``."""
+        def build():
+            from google import genai
+            return genai.Client(api_key=api_key)
+        return self._sdk_client(('genai', api_key), build)
+
+    def groq(self, api_key):
+        """Return the shared Groq client for ``api_key``."""
+        def build():
+            import groq
+            return groq.Groq(api_key=api_key)
+        return self._sdk_client(('groq', api_key), build)
+
+    def timeout(self, read=None):
+        """(connect, read) timeout tuple for requests."""
+        return (self.connect_timeout, read or self.read_timeout)
+
+    def close(self):
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions = {}
+            self._sdk_clients = {}
+
+    def _sdk_client(self, key, build):
+        client = self._sdk_clients.get(key)
+        if client is not None:
+            return client
+        with self._lock:
+            client = self._sdk_clients.get(key)
+            if client is None:
+                client = build()
+                self._sdk_clients[key] = client
+            return client
+
+    def _build_session(self):
+        # Connection errors never reached the provider, so they are safe to retry
+        # for any method; read errors are not retried to avoid doubling a slow
+        # generation, and 5xx retries are limited to idempotent methods.
+        retry = Retry(
+            total=self.max_retries,
+            connect=self.max_retries,
+            read=0,
+            status=self.max_retries,
+            status_forcelist=(502, 503, 504),
+            backoff_factor=self.backoff_factor,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            max_retries=retry,
+        )
+        session = requests.Session()
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
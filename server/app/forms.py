@@ -0,0 +1,99 @@
+"""
+Request parsing for endpoints that accept images either as base64 JSON
+fields or as multipart/form-data file parts.
+
+Werkzeug spools multipart file parts to a temporary file on disk in chunks
+once the body is over 500 KB. An image sent as a file part is therefore
+never held in memory as a base64 string next to its decoded copy, which is
+what happens when it comes inside a JSON body.
+"""
+import json
+from flask import Request, current_app, request
+from app import blob_store
+from app.images import sniff_mime
+from app.storage import MIME_EXTENSIONS
+
+# Form values that carry JSON (objects, lists) or booleans in multipart requests
+JSON_FIELDS = ('params', 'variants', 'model')
+BOOL_FIELDS = ('async', 'fresh')
+
+
+def body_limit(config_key):
+    """
+    Mark a view as accepting bodies up to ``app.config[config_key]`` bytes
+    instead of MAX_CONTENT_LENGTH; read by BodyLimitRequest.
+    """
+    def decorator(view):
+        view.max_content_length_key = config_key
+        return view
+    return decorator
+
+
+class BodyLimitRequest(Request):
+    """
+    Request whose ``max_content_length`` honours the view's body_limit.
+
+    Computed on read instead of assigned in a hook: the property only has a
+    setter from Flask 3.1 on.
+    """
+
+    @property
+    def max_content_length(self):
+        if self.url_rule is not None:
+            view = current_app.view_functions.get(self.endpoint)
+            limit_key = getattr(view, 'max_content_length_key', None)
+            if limit_key:
+                return current_app.config[limit_key]
+        return super().max_content_length
+
+
+def request_payload():
+    """
+    Return ``(data, files)`` for a JSON or multipart/form-data request.
+
+    Multipart requests send their non-file fields either as one ``json``
+    form field or as individual fields; ``params``/``variants``/``model``
+    may be JSON strings and ``async``/``fresh`` are ``true``/``1``.
+
+    Raises:
+        ValueError: a form field holds malformed JSON
+    """
+    if request.mimetype != 'multipart/form-data':
+        return request.get_json(silent=True), {}
+
+    if 'json' in request.form:
+        data = json.loads(request.form['json'])
+        if not isinstance(data, dict):
+            raise ValueError('json field must be an object')
+    else:
+        data = request.form.to_dict()
+        for key in JSON_FIELDS:
+            value = data.get(key)
+            if isinstance(value, str) and value[:1] in ('{', '['):
+                data[key] = json.loads(value)
+        for key in BOOL_FIELDS:
+            if isinstance(data.get(key), str):
+                data[key] = data[key].lower() in ('1', 'true', 'yes', 'on')
+    return data, request.files
+
+
+def store_upload(file_storage, extension=None):
+    """
+    Stream a multipart file part into the blob store.
+
+    The extension is sniffed from the file's first bytes unless given
+    (e.g. ``svg``). Returns the blob key, or None when no file was sent.
+
+    Raises:
+        ValueError: the file is not a supported image type
+    """
+    if file_storage is None or not file_storage.filename:
+        return None
+    stream = file_storage.stream
+    if extension is None:
+        head = stream.read(16)
+        stream.seek(0)
+        extension = MIME_EXTENSIONS.get(sniff_mime(head))
+        if extension is None:
+            raise ValueError(f'Unsupported image type for {file_storage.name}')
+    return blob_store.put_file(stream, extension)
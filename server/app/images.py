@@ -0,0 +1,162 @@
+"""
+Image derivatives: downsized WebP/JPEG variants of uploaded and generated images.
+
+Derivatives are written next to the uploads under ``_derived/<size>/`` the
+first time they are needed (or at save time when IMAGE_DERIVATIVES_EAGER is
+set) and served from disk afterwards.
+
+Also validates and downsizes user-supplied input images before they are sent
+to a provider.
+"""
+import io
+import os
+import uuid
+from PIL import Image, UnidentifiedImageError
+
+DERIVED_FOLDER = '_derived'
+
+# Longest edge in pixels for each named size
+DERIVATIVE_SIZES = {
+    'thumb': 200,
+    'medium': 640,
+}
+
+FORMATS = {
+    'webp': ('WEBP', 'image/webp'),
+    'jpeg': ('JPEG', 'image/jpeg'),
+}
+
+
+def derivative_relpath(relpath, size, fmt):
+    """Path of a derivative relative to UPLOAD_FOLDER."""
+    stem = os.path.splitext(relpath)[0]
+    return f"{DERIVED_FOLDER}/{size}/{stem}.{'jpg' if fmt == 'jpeg' else fmt}"
+
+
+def ensure_derivative(upload_folder, relpath, size, fmt='webp', quality=80):
+    """
+    Return the relative path of the ``size``/``fmt`` variant of ``relpath``,
+    rendering it first if it does not exist yet.
+
+    Raises:
+        KeyError: unknown size or format
+        FileNotFoundError: the source image does not exist
+        OSError: the source cannot be decoded, including decompression bombs
+    """
+    max_edge = DERIVATIVE_SIZES[size]
+    pil_format, _ = FORMATS[fmt]
+    derived = derivative_relpath(relpath, size, fmt)
+    target = os.path.join(upload_folder, derived)
+    if os.path.exists(target):
+        return derived
+
+    source = os.path.join(upload_folder, relpath)
+    try:
+        img = Image.open(source)
+    except Image.DecompressionBombError as e:
+        # Not an OSError; callers fall back to the original on OSError
+        raise OSError(f'{relpath} is too large to decode') from e
+    with img:
+        img.thumbnail((max_edge, max_edge), Image.LANCZOS)
+        if pil_format == 'JPEG' and img.mode not in ('RGB', 'L'):
+            img = img.convert('RGB')
+        elif img.mode not in ('RGB', 'RGBA', 'L'):
+            img = img.convert('RGBA')
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        tmp_path = f"{target}.{uuid.uuid4().hex}.tmp"
+        img.save(tmp_path, pil_format, quality=quality, optimize=True)
+    os.replace(tmp_path, target)
+    return derived
+
+
+def create_derivatives(upload_folder, relpath, quality=80):
+    """Render every size in both formats, e.g. right after an image is saved."""
+    for size in DERIVATIVE_SIZES:
+        for fmt in FORMATS:
+            ensure_derivative(upload_folder, relpath, size, fmt, quality)
+
+
+def negotiate_format(accept_header):
+    """WebP for clients that advertise it, JPEG otherwise."""
+    return 'webp' if 'image/webp' in (accept_header or '') else 'jpeg'
+
+
+# Formats providers accept as-is; anything else is re-encoded
+INPUT_FORMATS = {
+    'PNG': 'image/png',
+    'JPEG': 'image/jpeg',
+    'WEBP': 'image/webp',
+}
+
+
+class InvalidImageError(ValueError):
+    """Raised for input images that are not decodable or too large."""
+
+
+def sniff_mime(data):
+    """MIME type from the magic bytes of PNG/JPEG/WebP/GIF data, else None."""
+    if data.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'image/png'
+    if data.startswith(b'\xff\xd8\xff'):
+        return 'image/jpeg'
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return 'image/webp'
+    if data[:6] in (b'GIF87a', b'GIF89a'):
+        return 'image/gif'
+    return None
+
+
+def verify_image(data):
+    """
+    Check that ``data`` is a PNG/JPEG/WebP/GIF image Pillow can decode.
+
+    Returns:
+        the sniffed MIME type
+
+    Raises:
+        InvalidImageError: unknown format or undecodable data
+    """
+    mime = sniff_mime(data)
+    if mime is None:
+        raise InvalidImageError('Not a PNG, JPEG, WebP or GIF image')
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            img.verify()
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError, SyntaxError) as e:
+        raise InvalidImageError('Image could not be decoded') from e
+    return mime
+
+
+def normalize_input_image(data, max_bytes=10 * 1024 * 1024, max_edge=1536):
+    """
+    Validate an uploaded input image and shrink it for the provider upload.
+
+    The format is sniffed by Pillow, not trusted from the data URL. Images
+    within ``max_edge`` in a provider-friendly format are returned unchanged;
+    larger or other formats are downscaled and re-encoded (JPEG, or PNG when
+    there is transparency).
+
+    Returns:
+        (bytes, mime_type) tuple
+
+    Raises:
+        InvalidImageError: not an image, or larger than ``max_bytes``
+    """
+    if len(data) > max_bytes:
+        raise InvalidImageError(f'Input image exceeds {max_bytes // (1024 * 1024)} MB')
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            img.load()
+            if img.format in INPUT_FORMATS and max(img.size) <= max_edge:
+                return data, INPUT_FORMATS[img.format]
+
+            img.thumbnail((max_edge, max_edge), Image.LANCZOS)
+            has_alpha = img.mode in ('RGBA', 'LA', 'PA') or 'transparency' in img.info
+            out = io.BytesIO()
+            if has_alpha:
+                img.convert('RGBA').save(out, 'PNG', optimize=True)
+                return out.getvalue(), 'image/png'
+            img.convert('RGB').save(out, 'JPEG', quality=90, optimize=True)
+            return out.getvalue(), 'image/jpeg'
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError) as e:
+        raise InvalidImageError('Input image could not be decoded') from e
@@ -0,0 +1,278 @@
+"""
+Background job queue for long-running generation requests.
+
+Routes submit a callable and immediately hand the job id back to the client;
+the callable runs on a worker backend inside an application context and the
+client polls the job for progress and the final result.
+
+Job state lives in a job store. The default ``memory`` store only serves polls
+that reach the process that accepted the job, so deployments with several
+worker processes set JOB_STORE=database: every state change is written to the
+``generation_jobs`` table and any worker can answer the poll.
+"""
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+
+class QueueFullError(Exception):
+    """Raised when too many jobs are already pending."""
+
+
+class Job:
+    """A single unit of queued work and its observable state."""
+
+    def __init__(self, account_id, kind, job_id=None):
+        self.id = job_id or str(uuid.uuid4())
+        self.account_id = account_id
+        self.kind = kind
+        self.status = 'queued'  # queued, running, complete, failed
+        self.stage = 'queued'
+        self.progress = 0
+        self.detail = None
+        self.result = None
+        self.error = None
+        self.status_code = None
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        self.on_change = None  # called with the job after every state change
+
+    @property
+    def finished(self):
+        return self.status in ('complete', 'failed')
+
+    def update(self, stage, progress=None, detail=None):
+        self.stage = stage
+        if progress is not None:
+            self.progress = progress
+        self.detail = detail
+        self.updated_at = time.time()
+        if self.on_change:
+            self.on_change(self)
+
+    def to_dict(self):
+        result = {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'stage': self.stage,
+            'progress': self.progress,
+            'detail': self.detail,
+            'created_at': self.created_at,
+            'updated_at': self.updated_at,
+        }
+        if self.status == 'complete':
+            result['result'] = self.result
+        if self.status == 'failed':
+            result['error'] = self.error
+            result['status_code'] = self.status_code
+        return result
+
+
+class ThreadBackend:
+    """Runs jobs on a local thread pool (provider calls are I/O bound)."""
+
+    def __init__(self, max_workers):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job-worker')
+
+    def submit(self, fn):
+        self._executor.submit(fn)
+
+    def shutdown(self, wait=False):
+        self._executor.shutdown(wait=wait)
+
+
+class InlineBackend:
+    """Runs jobs synchronously in the submitting thread, useful for debugging."""
+
+    def __init__(self, max_workers=None):
+        pass
+
+    def submit(self, fn):
+        fn()
+
+    def shutdown(self, wait=False):
+        pass
+
+
+class MemoryJobStore:
+    """Jobs held in a dict; polls must reach the process that accepted the job."""
+
+    def __init__(self, app):
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def add(self, job, max_pending, cutoff):
+        with self._lock:
+            pending = sum(1 for j in self._jobs.values() if not j.finished)
+            if pending >= max_pending:
+                raise QueueFullError('Too many pending jobs, please try again shortly')
+            self._jobs[job.id] = job
+
+    def save(self, job):
+        pass  # the registry holds the live Job object
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def prune(self, cutoff):
+        with self._lock:
+            expired = [jid for jid, j in self._jobs.items() if j.finished and j.updated_at < cutoff]
+            for jid in expired:
+                del self._jobs[jid]
+
+
+class DatabaseJobStore:
+    """
+    Jobs in the ``generation_jobs`` table, shared by every worker process.
+
+    Writes go through their own engine connection so progress updates never
+    commit (or roll back) the generation's work in ``db.session``.
+    """
+
+    COLUMNS = ('account_id', 'kind', 'status', 'stage', 'progress', 'detail',
+               'result', 'error', 'status_code', 'created_at', 'updated_at')
+
+    def __init__(self, app):
+        from app import db
+        from app.models import GenerationJob
+
+        self._db = db
+        self._table = GenerationJob.__table__
+
+    def add(self, job, max_pending, cutoff):
+        table = self._table
+        with self._db.engine.begin() as conn:
+            # Jobs not updated within the result TTL belong to a dead worker
+            pending = conn.execute(
+                self._db.select(self._db.func.count()).select_from(table).where(
+                    table.c.status.in_(('queued', 'running')), table.c.updated_at >= cutoff)
+            ).scalar()
+            if pending >= max_pending:
+                raise QueueFullError('Too many pending jobs, please try again shortly')
+            conn.execute(table.insert().values(id=job.id, **self._values(job)))
+
+    def save(self, job):
+        with self._db.engine.begin() as conn:
+            conn.execute(self._table.update().where(self._table.c.id == job.id).values(**self._values(job)))
+
+    def get(self, job_id):
+        with self._db.engine.connect() as conn:
+            row = conn.execute(self._table.select().where(self._table.c.id == job_id)).mappings().first()
+        if row is None:
+            return None
+        job = Job(row['account_id'], row['kind'], job_id=row['id'])
+        for column in self.COLUMNS:
+            setattr(job, column, row[column])
+        return job
+
+    def prune(self, cutoff):
+        with self._db.engine.begin() as conn:
+            conn.execute(self._table.delete().where(self._table.c.updated_at < cutoff))
+
+    def _values(self, job):
+        return {column: getattr(job, column) for column in self.COLUMNS}
+
+
+STORES = {
+    'memory': MemoryJobStore,
+    'database': DatabaseJobStore,
+}
+
+
+def register_store(name, factory):
+    """Register a job store; ``factory(app)`` must return an object with add/save/get/prune."""
+    STORES[name] = factory
+
+
+BACKENDS = {
+    'thread': ThreadBackend,
+    'inline': InlineBackend,
+}
+
+
+def register_backend(name, factory):
+    """Register a job backend; ``factory(max_workers)`` must return an object with submit/shutdown."""
+    BACKENDS[name] = factory
+
+
+class JobQueue:
+    """Job registry bound to a Flask app, in the style of a Flask extension."""
+
+    def __init__(self, app=None):
+        self.app = None
+        self._backend = None
+        self._store = None
+        self._max_pending = 500
+        self._result_ttl = 3600
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        backend_name = app.config.get('JOB_BACKEND', 'thread')
+        if backend_name not in BACKENDS:
+            raise ValueError(f'Unknown job backend: {backend_name}')
+        if self._backend is not None:
+            self._backend.shutdown()
+        self._backend = BACKENDS[backend_name](app.config.get('JOB_WORKERS', 4))
+        store_name = app.config.get('JOB_STORE', 'memory')
+        if store_name not in STORES:
+            raise ValueError(f'Unknown job store: {store_name}')
+        self._store = STORES[store_name](app)
+        self._max_pending = app.config.get('JOB_MAX_PENDING', 500)
+        self._result_ttl = app.config.get('JOB_RESULT_TTL', 3600)
+        self.app = app
+        app.extensions['job_queue'] = self
+
+    def submit(self, account_id, kind, fn, *args, **kwargs):
+        """
+        Queue ``fn(job, *args, **kwargs)``; it must return a ``(body, status)`` tuple.
+
+        Raises:
+            QueueFullError: if JOB_MAX_PENDING jobs are already waiting or running
+        """
+        cutoff = time.time() - self._result_ttl
+        self._store.prune(cutoff)
+        job = Job(account_id, kind)
+        self._store.add(job, self._max_pending, cutoff)
+        job.on_change = self._save
+
+        app = self.app
+
+        def run():
+            with app.app_context():
+                job.status = 'running'
+                job.update('running')
+                try:
+                    body, status = fn(job, *args, **kwargs)
+                except Exception as e:
+                    import traceback
+                    print(f"Job {job.id} error: {traceback.format_exc()}")
+                    body, status = {'error': str(e)}, 500
+                if status < 400:
+                    job.result = body
+                    job.status = 'complete'
+                    job.update('complete', 100)
+                else:
+                    job.error = body.get('error', 'Job failed')
+                    job.status_code = status
+                    job.status = 'failed'
+                    job.update('failed')
+
+        self._backend.submit(run)
+        return job
+
+    def _save(self, job):
+        # A failed state write must not fail the generation itself
+        try:
+            self._store.save(job)
+        except Exception as e:
+            print(f"Job {job.id}: could not save state: {e}")
+
+    def get(self, job_id, account_id=None):
+        """Return a job, optionally only if it belongs to ``account_id``."""
+        job = self._store.get(job_id)
+        if job is None or (account_id is not None and job.account_id != account_id):
+            return None
+        return job
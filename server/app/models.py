@@ -2,7 +2,7 @@
 Database models for Dress Customizer application.
 """
 from datetime import datetime
-from app import db
+from app import db, blob_store
 import uuid
 
 
@@ -72,6 +72,9 @@ class BodyProfile(db.Model):
 class GownDesign(db.Model):
     """GownDesign model for storing dress design variants."""
     __tablename__ = 'gown_designs'
+    __table_args__ = (
+        db.Index('ix_gown_designs_account_created', 'account_id', 'created_at', 'id'),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     account_id = db.Column(db.String(36), db.ForeignKey('accounts.id'), nullable=False)
@@ -88,16 +91,15 @@ class GownDesign(db.Model):
     texture_intensity = db.Column(db.Float, nullable=False, default=40)
     skirt_volume = db.Column(db.Float, nullable=False, default=60)
     
-    # SVG data
-    svg = db.Column(db.Text, nullable=True)
-    thumbnail = db.Column(db.LargeBinary, nullable=True)
+    # SVG and thumbnail live in the blob store; rows keep the content-hash key
+    svg_key = db.Column(db.String(255), nullable=True)
+    thumbnail_key = db.Column(db.String(255), nullable=True)
     image_url = db.Column(db.String(512), nullable=True)
     
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     def to_dict(self, include_large_fields=False):
-        import base64
         result = {
             'id': self.id,
             'account_id': self.account_id,
@@ -116,15 +118,12 @@ class GownDesign(db.Model):
         }
         
         result['image_url'] = self.image_url
+        result['thumbnail_url'] = blob_store.url(self.thumbnail_key)
+        result['svg_url'] = blob_store.url(self.svg_key)
 
-        # Include large fields if requested (e.g., for detail views)
+        # Detail views keep the historical 'thumbnail' field, now a cacheable URL
         if include_large_fields:
-            result['svg'] = self.svg
-            # Convert binary thumbnail to base64 for JSON
-            if self.thumbnail:
-                result['thumbnail'] = f"data:image/png;base64,{base64.b64encode(self.thumbnail).decode('utf-8')}"
-            else:
-                result['thumbnail'] = None
+            result['thumbnail'] = result['thumbnail_url']
         
         return result
 
@@ -132,6 +131,9 @@ class GownDesign(db.Model):
 class Conversation(db.Model):
     """Conversation model for chat/discussion history."""
     __tablename__ = 'conversations'
+    __table_args__ = (
+        db.Index('ix_conversations_account_updated', 'account_id', 'updated_at', 'id'),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     account_id = db.Column(db.String(36), db.ForeignKey('accounts.id'), nullable=False)
@@ -140,12 +142,15 @@ class Conversation(db.Model):
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
     
-    def to_dict(self, include_messages=False):
+    def to_dict(self, include_messages=False, message_count=None):
+        # Listings pass a precomputed count so the messages are not loaded
+        if message_count is None:
+            message_count = len(self.messages)
         result = {
             'id': self.id,
             'account_id': self.account_id,
             'title': self.title,
-            'message_count': len(self.messages),
+            'message_count': message_count,
             'created_at': self.created_at.isoformat(),
             'updated_at': self.updated_at.isoformat()
         }
@@ -157,6 +162,9 @@ class Conversation(db.Model):
 class ChatMessage(db.Model):
     """ChatMessage model for storing conversation messages."""
     __tablename__ = 'chat_messages'
+    __table_args__ = (
+        db.Index('ix_chat_messages_conversation_created', 'conversation_id', 'created_at', 'id'),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     conversation_id = db.Column(db.String(36), db.ForeignKey('conversations.id'), nullable=False)
@@ -179,6 +187,9 @@ class ChatMessage(db.Model):
 class Design(db.Model):
     """Design model for storing AI-generated dress designs."""
     __tablename__ = 'designs'
+    __table_args__ = (
+        db.Index('ix_designs_user_created', 'user_id', 'created_at', 'id'),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = db.Column(db.String(36), db.ForeignKey('accounts.id'), nullable=False)
@@ -195,9 +206,9 @@ class Design(db.Model):
     texture_intensity = db.Column(db.Float, nullable=False, default=40)
     skirt_volume = db.Column(db.Float, nullable=False, default=60)
     
-    # Image data
-    svg = db.Column(db.Text, nullable=True)
-    thumbnail = db.Column(db.LargeBinary, nullable=True)
+    # Image data; SVG and thumbnail live in the blob store
+    svg_key = db.Column(db.String(255), nullable=True)
+    thumbnail_key = db.Column(db.String(255), nullable=True)
     image_url = db.Column(db.String(512), nullable=True)
     
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
@@ -218,6 +229,8 @@ class Design(db.Model):
             'texture_intensity': self.texture_intensity,
             'skirt_volume': self.skirt_volume,
             'image_url': self.image_url,
+            'thumbnail_url': blob_store.url(self.thumbnail_key),
+            'svg_url': blob_store.url(self.svg_key),
             'created_at': self.created_at.isoformat(),
             'updated_at': self.updated_at.isoformat()
         }
@@ -226,6 +239,9 @@ class Design(db.Model):
 class SavedStyle(db.Model):
     """Saved design styles per user."""
     __tablename__ = 'saved_styles'
+    __table_args__ = (
+        db.Index('ix_saved_styles_account_created', 'account_id', 'created_at', 'id'),
+    )
 
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     account_id = db.Column(db.String(36), db.ForeignKey('accounts.id'), nullable=False)
@@ -256,3 +272,22 @@ class SavedStyle(db.Model):
             'category': self.category,
             'created_at': self.created_at.isoformat(),
         }
+
+
+class GenerationJob(db.Model):
+    """Background job state shared by worker processes (JOB_STORE=database)."""
+    __tablename__ = 'generation_jobs'
+
+    id = db.Column(db.String(36), primary_key=True)
+    account_id = db.Column(db.String(36), nullable=False, index=True)
+    kind = db.Column(db.String(50), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='queued')
+    stage = db.Column(db.String(50), nullable=False, default='queued')
+    progress = db.Column(db.Integer, nullable=False, default=0)
+    detail = db.Column(db.Text, nullable=True)
+    result = db.Column(db.JSON, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    status_code = db.Column(db.Integer, nullable=True)
+    # Epoch seconds, as kept on app.jobs.Job
+    created_at = db.Column(db.Float, nullable=False)
+    updated_at = db.Column(db.Float, nullable=False, index=True)
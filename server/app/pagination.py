@@ -0,0 +1,115 @@
+"""
+Keyset (cursor) pagination helpers for per-account listings.
+
+Pages are ordered newest first on ``(timestamp, id)``; the cursor encodes the
+last row of a page, so each page is an index range scan no matter how deep
+the client has paged. Listings may also be searched (``q``) and ordered by
+name, both server side, so clients never need every row to filter or sort.
+"""
+import base64
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import or_, tuple_
+
+
+class InvalidCursorError(ValueError):
+    """Raised for cursors that were not produced by encode_cursor."""
+
+
+def encode_cursor(value, row_id):
+    """``value`` is the sort key of the last row: a timestamp, or a name (str)."""
+    value = f"s:{value}" if isinstance(value, str) else value.isoformat()
+    raw = f"{value}|{row_id}".encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        value, row_id = base64.urlsafe_b64decode(padded).decode('utf-8').rsplit('|', 1)
+        if value.startswith('s:'):
+            return value[2:], row_id
+        return datetime.fromisoformat(value), row_id
+    except (ValueError, UnicodeDecodeError) as e:
+        raise InvalidCursorError('Invalid cursor') from e
+
+
+def page_args(args):
+    """
+    Read ``cursor`` and ``limit`` from request args; the limit is clamped to PAGE_SIZE_MAX.
+
+    Raises:
+        InvalidCursorError: if limit is not an integer
+    """
+    default = current_app.config.get('PAGE_SIZE_DEFAULT', 50)
+    maximum = current_app.config.get('PAGE_SIZE_MAX', 100)
+    try:
+        limit = int(args.get('limit', default))
+    except ValueError as e:
+        raise InvalidCursorError('limit must be an integer') from e
+    return args.get('cursor') or None, max(1, min(limit, maximum))
+
+
+def list_order(args, timestamp_column, name_column=None):
+    """
+    Read ``order`` (newest, oldest or name) from request args.
+
+    Returns:
+        (sort_column, ascending) tuple for keyset_page
+
+    Raises:
+        InvalidCursorError: for an unknown order
+    """
+    order = args.get('order', 'newest')
+    if order == 'newest':
+        return timestamp_column, False
+    if order == 'oldest':
+        return timestamp_column, True
+    if order == 'name' and name_column is not None:
+        return name_column, True
+    raise InvalidCursorError(f'Unknown order: {order}')
+
+
+def search_filter(query, text, *columns):
+    """Keep rows where any of ``columns`` contains ``text``, case-insensitively."""
+    text = (text or '').strip()
+    if not text:
+        return query
+    escaped = text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return query.filter(or_(*(column.ilike(f'%{escaped}%', escape='\\') for column in columns)))
+
+
+def wants_total(args):
+    """True when the client asked for the listing's row count (``total=1``)."""
+    return args.get('total') in ('1', 'true')
+
+
+def keyset_query(query, sort_column, id_column, cursor=None, limit=50, ascending=False):
+    """Apply the cursor bound, ordering and ``limit + 1`` row limit to ``query``."""
+    key = tuple_(sort_column, id_column)
+    if cursor:
+        timestamp, row_id = decode_cursor(cursor)
+        bound = tuple_(timestamp, row_id)
+        query = query.filter(key > bound if ascending else key < bound)
+
+    if ascending:
+        query = query.order_by(sort_column.asc(), id_column.asc())
+    else:
+        query = query.order_by(sort_column.desc(), id_column.desc())
+    return query.limit(limit + 1)
+
+
+def keyset_page(query, sort_column, id_column, cursor=None, limit=50, ascending=False):
+    """
+    Return ``(rows, next_cursor)`` for one page of ``query`` ordered on
+    ``(sort_column, id_column)``, newest first unless ``ascending``.
+    ``next_cursor`` is None on the last page.
+    """
+    rows = keyset_query(query, sort_column, id_column, cursor, limit, ascending).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, sort_column.key), getattr(last, id_column.key))
+    return rows, next_cursor
@@ -0,0 +1,68 @@
+"""
+Password hashing with a configurable algorithm and cost.
+
+Hashes are computed with Werkzeug's ``generate_password_hash`` using
+PASSWORD_HASH_METHOD (e.g. ``scrypt:32768:8:1`` or ``pbkdf2:sha256:600000``)
+rather than whatever default the installed Werkzeug ships. Accounts hashed
+with other parameters are upgraded on their next successful sign-in.
+
+Hashing runs on a small thread pool of PASSWORD_HASH_WORKERS threads.
+hashlib releases the GIL while it works, so a burst of sign-ins uses at most
+that many cores and queues behind them instead of starving other requests.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.security import check_password_hash, generate_password_hash
+
+DEFAULT_METHOD = 'scrypt:32768:8:1'
+
+
+class PasswordHasher:
+    """Flask extension wrapping Werkzeug's password hashing."""
+
+    def __init__(self, app=None):
+        self.method = DEFAULT_METHOD
+        self.salt_length = 16
+        self.workers = os.cpu_count() or 1
+        self._executor = None
+        self._canonical_method = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.method = app.config.get('PASSWORD_HASH_METHOD') or DEFAULT_METHOD
+        self.salt_length = app.config.get('PASSWORD_SALT_LENGTH', 16)
+        self.workers = app.config.get('PASSWORD_HASH_WORKERS') or os.cpu_count() or 1
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+            self._executor = None
+            self._canonical_method = None
+        app.extensions['password_hasher'] = self
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method, self.salt_length)
+
+    def verify(self, password_hash, password):
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """True if ``password_hash`` was made with a different method or cost."""
+        return password_hash.split('$', 1)[0] != self.canonical_method()
+
+    def canonical_method(self):
+        """The configured method with Werkzeug's defaults filled in, e.g. ``scrypt`` -> ``scrypt:32768:8:1``."""
+        if self._canonical_method is None:
+            sample = generate_password_hash('', self.method, salt_length=1)
+            self._canonical_method = sample.split('$', 1)[0]
+        return self._canonical_method
+
+    def _run(self, fn, *args):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                    thread_name_prefix='password-hash')
+            executor = self._executor
+        return executor.submit(fn, *args).result()
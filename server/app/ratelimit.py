@@ -0,0 +1,180 @@
+"""
+Per-account token-bucket admission control for the generation endpoints.
+
+Each account has one bucket of ``burst`` tokens refilled at ``per_minute``
+tokens a minute, both chosen by its account_type (RATE_LIMITS). A request
+that finds the bucket empty is answered with 429 and a Retry-After header
+instead of occupying a worker. Views call admit() once the request has
+passed validation, so malformed requests are never charged.
+
+Buckets live in process memory by default. Multi-worker deployments set
+RATE_LIMIT_BACKEND=redis so every worker draws from the same buckets; the
+redis package is only imported when that backend is selected.
+"""
+import math
+import threading
+import time
+from flask import jsonify
+
+
+class MemoryBackend:
+    """Buckets in a dict guarded by a lock; state is per process."""
+
+    PRUNE_ABOVE = 10000
+
+    def __init__(self, app):
+        self._buckets = {}  # key -> (tokens, updated_at, rate, burst)
+        self._lock = threading.Lock()
+
+    def take(self, key, rate, burst, cost=1):
+        """
+        Take ``cost`` tokens from bucket ``key`` refilled at ``rate`` tokens/second.
+
+        Returns:
+            (allowed, retry_after_seconds) tuple
+        """
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at, _, _ = self._buckets.get(key, (burst, now, rate, burst))
+            tokens = min(burst, tokens + (now - updated_at) * rate)
+            if tokens >= cost:
+                self._buckets[key] = (tokens - cost, now, rate, burst)
+                allowed, retry_after = True, 0.0
+            else:
+                self._buckets[key] = (tokens, now, rate, burst)
+                allowed, retry_after = False, (cost - tokens) / rate
+            if len(self._buckets) > self.PRUNE_ABOVE:
+                self._prune(now)
+        return allowed, retry_after
+
+    def _prune(self, now):
+        # A bucket that has refilled completely is the same as no bucket. Each
+        # bucket is judged by its own rate and burst: account types differ.
+        for key in [k for k, (tokens, ts, rate, burst) in self._buckets.items()
+                    if now - ts >= (burst - tokens) / rate]:
+            del self._buckets[key]
+
+
+# Atomic refill-and-take; uses the server clock so workers agree on time
+_REDIS_TAKE = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local retry_after = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    retry_after = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return {allowed, tostring(retry_after)}
+"""
+
+
+class RedisBackend:
+    """Buckets shared by every worker through Redis (RATE_LIMIT_REDIS_URL)."""
+
+    def __init__(self, app):
+        import redis
+
+        self._client = redis.Redis.from_url(app.config['RATE_LIMIT_REDIS_URL'])
+        self._take = self._client.register_script(_REDIS_TAKE)
+
+    def take(self, key, rate, burst, cost=1):
+        allowed, retry_after = self._take(keys=[key], args=[rate, burst, cost])
+        return bool(allowed), float(retry_after)
+
+
+BACKENDS = {
+    'memory': MemoryBackend,
+    'redis': RedisBackend,
+}
+
+
+def register_backend(name, factory):
+    """Register a bucket store; ``factory(app)`` must return an object with take()."""
+    BACKENDS[name] = factory
+
+
+def parse_limit(value):
+    """``"<per minute>:<burst>"`` -> (per_minute, burst)."""
+    per_minute, burst = value.split(':', 1)
+    return float(per_minute), int(burst)
+
+
+class RateLimiter:
+    """Flask extension applying per-account_type token buckets."""
+
+    def __init__(self, app=None, account_loader=None):
+        self.enabled = True
+        self.limits = {}
+        self.account_loader = account_loader
+        self._backend = None
+        if app is not None:
+            self.init_app(app, account_loader)
+
+    def init_app(self, app, account_loader=None):
+        if account_loader is not None:
+            self.account_loader = account_loader
+        self.enabled = app.config.get('RATE_LIMIT_ENABLED', True)
+        self.limits = dict(app.config.get('RATE_LIMITS', {}))
+        backend_name = app.config.get('RATE_LIMIT_BACKEND', 'memory')
+        if backend_name not in BACKENDS:
+            raise ValueError(f'Unknown rate limit backend: {backend_name}')
+        self._backend = BACKENDS[backend_name](app) if self.enabled else None
+        app.extensions['rate_limiter'] = self
+
+    def limit_for(self, account_id):
+        """(per_minute, burst) for the account's type; unknown types get 'individual'."""
+        account = self.account_loader(account_id) if self.account_loader else None
+        account_type = (account or {}).get('account_type') or 'individual'
+        return self.limits.get(account_type) or self.limits['individual']
+
+    def max_cost(self, account_id):
+        """Largest cost a single request can be admitted for (the burst); None when disabled."""
+        return self.limit_for(account_id)[1] if self.enabled else None
+
+    def check(self, account_id, bucket='generation', cost=1):
+        """
+        Take ``cost`` tokens for ``account_id``. A cost above the account's
+        burst is never admitted; reject such requests first (max_cost).
+
+        Returns:
+            (allowed, retry_after_seconds) tuple; always allowed when disabled
+        """
+        if not self.enabled:
+            return True, 0.0
+        per_minute, burst = self.limit_for(account_id)
+        try:
+            return self._backend.take(f"ratelimit:{bucket}:{account_id}", per_minute / 60.0,
+                                      burst, cost)
+        except Exception as e:
+            # A broken shared store must not take generation down with it
+            print(f"Rate limiter backend failed, allowing request: {e}")
+            return True, 0.0
+
+    def admit(self, account_id, cost=1, bucket='generation'):
+        """
+        Take ``cost`` tokens; returns None when allowed, else the 429 response.
+        Call it after the view's 400 checks.
+        """
+        allowed, retry_after = self.check(account_id, bucket, cost)
+        if allowed:
+            return None
+        seconds = max(1, math.ceil(retry_after))
+        response = jsonify({
+            'error': f'Too many generation requests. Try again in {seconds}s.',
+            'retry_after': seconds,
+        })
+        response.status_code = 429
+        response.headers['Retry-After'] = str(seconds)
+        return response
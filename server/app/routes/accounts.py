@@ -3,7 +3,7 @@ Account routes: get profile, update profile.
 """
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app import db
+from app import db, account_cache
 from app.models import Account, BodyProfile
 
 accounts_bp = Blueprint('accounts', __name__)
@@ -15,12 +15,12 @@ def get_profile():
     """Get current account profile."""
     try:
         account_id = get_jwt_identity()
-        account = Account.query.get(account_id)
+        account = account_cache.get(account_id)
         
         if not account:
             return jsonify({'error': 'Account not found'}), 404
         
-        return jsonify(account.to_dict()), 200
+        return jsonify(account), 200
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -49,6 +49,7 @@ def update_profile():
             account.account_type = data['account_type']
         
         db.session.commit()
+        account_cache.invalidate(account_id)
         
         return jsonify({
             'message': 'Profile updated successfully',
@@ -73,6 +74,7 @@ def delete_account():
         
         db.session.delete(account)
         db.session.commit()
+        account_cache.invalidate(account_id)
         
         return jsonify({'message': 'Account deleted successfully'}), 200
     
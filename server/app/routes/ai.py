@@ -2,21 +2,36 @@
 AI image generation routes: saves images locally, stores in DB with chat history.
 """
 import base64
+import binascii
+import hashlib
 import io
 import json
 import os
+import queue
+import time
 import uuid
 import requests
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, Response, request, jsonify, current_app, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app import db
+from app import (db, job_queue, image_cache, image_flights, prompt_cache, response_cache, account_cache,
+                 model_catalog, provider_clients, provider_health, rate_limiter)
+from app.caching import ImageCache, PromptCache
+from app.forms import request_payload
+from app.images import create_derivatives, normalize_input_image, sniff_mime
+from app.jobs import QueueFullError
 from app.models import Conversation, ChatMessage
 
 ai_bp = Blueprint('ai', __name__)
 
 SUBNP_BASE_URL = "https://subnp.com"
 POLLINATIONS_BASE = "https://image.pollinations.ai/prompt"
+SUBNP_FALLBACK_MODELS = ['turbo', 'flux', 'magic']
+MIN_IMAGE_BYTES = 1000  # smaller payloads are error pages, not images
+
+# Writes input photos to disk when no provider needs them by URL
+_persist_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='image-persist')
 
 
 def build_dress_prompt(prompt_text, params):
@@ -47,24 +62,41 @@ def build_dress_prompt(prompt_text, params):
     return f"{subject}, fashion photography, studio lighting, clean background, sharp focus, high detail"
 
 
-def save_image_to_disk(image_bytes, subfolder='designs'):
+def upload_url(relpath, host_url=None):
+    return f"{host_url or request.host_url}api/uploads/{relpath}"
+
+
+def save_image_to_disk(image_bytes, subfolder='designs', host_url=None):
+    """Store image bytes under a content-hash filename; identical images share one file."""
     folder = os.path.join(current_app.config['UPLOAD_FOLDER'], subfolder)
     os.makedirs(folder, exist_ok=True)
-    filename = f"{uuid.uuid4()}.png"
+    filename = f"{hashlib.sha256(image_bytes).hexdigest()}.png"
     filepath = os.path.join(folder, filename)
-    with open(filepath, 'wb') as f:
-        f.write(image_bytes)
-    return f"{request.host_url}api/uploads/{subfolder}/{filename}"
+    if not os.path.exists(filepath):
+        tmp_path = f"{filepath}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(image_bytes)
+        os.replace(tmp_path, filepath)
+        if current_app.config.get('IMAGE_DERIVATIVES_EAGER'):
+            try:
+                create_derivatives(current_app.config['UPLOAD_FOLDER'], f"{subfolder}/{filename}",
+                                   current_app.config['IMAGE_DERIVATIVE_QUALITY'])
+            except OSError as e:
+                print(f"Derivative generation failed for {filename}: {e}")
+    return upload_url(f"{subfolder}/{filename}", host_url)
 
 
-def ensure_conversation(account_id, conv_id=None, prompt_text=""):
+def ensure_conversation(account_id, conv_id=None, prompt_text="", commit=True):
     if conv_id:
         conv = Conversation.query.filter_by(id=conv_id, account_id=account_id).first()
         if conv:
             return conv
     conv = Conversation(account_id=account_id, title=prompt_text[:80] or "Design Session")
     db.session.add(conv)
-    db.session.commit()
+    if commit:
+        db.session.commit()
+    else:
+        db.session.flush()
     return conv
 
 
@@ -79,35 +111,53 @@ def add_chat_message(conversation_id, role, content, image_url=None):
     return msg
 
 
+GEMINI_ENHANCE_MODEL = 'gemini-2.0-flash'
+
+COLOR_NAMES = {
+    '#111827': 'black', '#2457F5': 'blue', '#E11D48': 'red',
+    '#10B981': 'emerald green', '#A855F7': 'purple', '#F59E0B': 'gold',
+    '#FFFFFF': 'white', '#EC4899': 'pink', '#1E3A8A': 'navy',
+    '#EAB308': 'yellow', '#8B5CF6': 'violet', '#2D5016': 'forest green',
+}
+
+
 def enhance_prompt_with_gemini(prompt_text, params):
+    """
+    Gemini-rewritten image prompt, or None when Gemini is unavailable.
+
+    The result only depends on the prompt text and the color, pattern and
+    texture params, so it is memoized in the prompt cache under those.
+    """
     api_key = current_app.config.get('GOOGLE_API_KEY')
     if not api_key:
         return None
 
-    try:
-        from google import genai
-        client = genai.Client(api_key=api_key)
+    color_name = COLOR_NAMES.get(params.get('color', '').upper(), params.get('color', ''))
+    pattern = params.get('pattern', 'solid')
+    texture = params.get('texture', 'satin')
+    cache_key = PromptCache.make_key(GEMINI_ENHANCE_MODEL, prompt_text, color_name, pattern, texture)
+    cached = prompt_cache.get(cache_key)
+    if cached:
+        return cached
 
-        color_map = {
-            '#111827': 'black', '#2457F5': 'blue', '#E11D48': 'red',
-            '#10B981': 'emerald green', '#A855F7': 'purple', '#F59E0B': 'gold',
-            '#FFFFFF': 'white', '#EC4899': 'pink', '#1E3A8A': 'navy',
-            '#EAB308': 'yellow', '#8B5CF6': 'violet', '#2D5016': 'forest green',
-        }
-        color_name = color_map.get(params.get('color', '').upper(), params.get('color', ''))
+    try:
+        client = provider_clients.genai(api_key)
 
         system = f"""You are a fashion prompt expert. Rewrite the user's request into a detailed, photorealistic image generation prompt.
-Include these details if relevant: color ({color_name}), pattern ({params.get('pattern', 'solid')}), fabric ({params.get('texture', 'satin')}).
+Include these details if relevant: color ({color_name}), pattern ({pattern}), fabric ({texture}).
 Keep it concise (under 200 characters). Output ONLY the prompt text, no explanation."""
 
         response = client.models.generate_content(
-            model='gemini-2.0-flash',
+            model=GEMINI_ENHANCE_MODEL,
             contents=f"Generate a photorealistic fashion image prompt for: {prompt_text or 'a garment'}",
             config={'system_instruction': system},
         )
-        return response.text.strip()
+        enhanced = response.text.strip()
     except Exception:
         return None
+    if enhanced:
+        prompt_cache.store(cache_key, enhanced)
+    return enhanced
 
 
 @ai_bp.route('/models', methods=['GET'])
@@ -131,25 +181,445 @@ def list_models():
     image_models.append({'id': 'gemini-enhanced', 'name': 'Gemini Image', 'provider': 'Google',
                          'type': 'image', 'requires_key': True, 'key_configured': bool(api_key), 'supports_image_input': True})
 
+    subnp_models, fetched_at = subnp_catalog()
+    for m in subnp_models:
+        image_models.append({'id': f"subnp-{m['model']}", 'name': f"SubNP ({m['model']})",
+                             'provider': m['provider'], 'type': 'image',
+                             'requires_key': False, 'key_configured': True, 'supports_image_input': False})
+
+    # Live provider health: breaker state plus recent latency percentiles
+    scoreboard = provider_health.scoreboard()
+    for m in image_models:
+        health = scoreboard.get(provider_for(m['id']))
+        m['available'] = health['available'] if health else True
+
+    resp = jsonify({'text_models': text_models, 'image_models': image_models, 'providers': scoreboard})
+    resp.add_etag()
+    last_modified = max(filter(None, [fetched_at, provider_health.updated_at()]), default=None)
+    if last_modified:
+        resp.last_modified = last_modified
+    resp.headers['Cache-Control'] = 'private, no-cache'
+    return resp.make_conditional(request)
+
+
+def subnp_catalog():
+    """(SubNP models, fetched_at); the fallback list until the catalog has loaded."""
+    subnp_models, fetched_at = model_catalog.get()
+    if subnp_models is None:
+        subnp_models = [{'model': m, 'provider': 'SubNP'} for m in SUBNP_FALLBACK_MODELS]
+    return subnp_models, fetched_at
+
+
+def check_image_model(model):
+    """
+    Validate a request's ``model``: an image model id, "fastest", or a
+    non-empty list of image model ids to race.
+
+    Raises:
+        ValueError: with a user-facing message
+    """
+    if isinstance(model, str):
+        return
+    if not isinstance(model, list):
+        raise ValueError('model must be a model id or a list of model ids')
+    if not model:
+        raise ValueError('model list must not be empty')
+    known = {'pollinations', 'gemini-enhanced'}
+    known.update(f"subnp-{m['model']}" for m in subnp_catalog()[0])
+    unknown = [m for m in model if not isinstance(m, str) or m not in known]
+    if unknown:
+        raise ValueError(f'Unknown image model(s): {", ".join(map(str, unknown))}')
+
+
+def fetch_subnp_models():
+    """Load the SubNP model list; used by the model catalog refresher."""
+    resp = provider_clients.session('subnp').get(
+        f"{SUBNP_BASE_URL}/api/free/models", timeout=provider_clients.timeout(10))
+    resp.raise_for_status()
+    return [{'model': m['model'], 'provider': m.get('provider', 'SubNP')}
+            for m in resp.json().get('models', [])]
+
+
+def read_generation_payload():
+    """
+    Generation request data from a JSON body or multipart form. A multipart
+    ``input_image`` file part is passed on as raw bytes in ``input_image_bytes``
+    instead of a base64 string.
+    """
+    data, files = request_payload()
+    upload = files.get('input_image')
+    if data is not None and upload is not None and upload.filename:
+        data['input_image_bytes'] = upload.read()
+    return data
+
+
+def generate_image_for_account(account_id, data, host_url, progress=None):
+    """
+    Run one image generation end to end: prompt building, provider call,
+    saving the PNG and recording the exchange in the conversation.
+
+    Returns:
+        (body, status) tuple; body is a JSON-serialisable dict
+    """
+    def report(stage, pct=None, detail=None):
+        if progress:
+            progress(stage, pct, detail)
+
+    prompt = data.get('prompt', '')
+    params = data.get('params', {})
+    model = data.get('model', 'pollinations')
+    conv_id = data.get('conversation_id')
+    input_image = data.get('input_image')
+
+    models = resolve_race_models(model, has_input_image=bool(input_image or data.get('input_image_bytes')))
+
+    # Decode and normalise the input photo in memory; it goes straight to the provider
+    input_image_bytes = None
+    input_image_url = None
+    if input_image or data.get('input_image_bytes'):
+        try:
+            raw = data.get('input_image_bytes') or base64.b64decode(
+                input_image.split(',')[1] if ',' in input_image else input_image)
+            input_image_bytes, _ = normalize_input_image(
+                raw, current_app.config['INPUT_IMAGE_MAX_BYTES'], current_app.config['INPUT_IMAGE_MAX_EDGE'])
+        except (binascii.Error, ValueError, TypeError) as e:
+            # b64decode raises ValueError for non-ASCII strings and TypeError
+            # for non-string JSON values; InvalidImageError is a ValueError
+            return {'error': f'Invalid input image: {e}'}, 400
+
+        if any(needs_input_url(m) for m in models or [model]):
+            # Pollinations fetches the photo by URL, so it must be on disk first
+            input_image_url = save_image_to_disk(input_image_bytes, subfolder='uploads', host_url=host_url)
+        else:
+            persist_in_background(input_image_bytes, 'uploads', host_url)
+
+    report('building_prompt', 10)
+
+    def candidate(candidate_model):
+        return prepare_and_fetch(candidate_model, prompt, params, input_image_bytes,
+                                 input_image_url, fresh=bool(data.get('fresh')), report=report)
+
+    if models is None:
+        result = candidate(model)
+        if result['error']:
+            return {'error': result['error']}, result['status']
+    else:
+        # Race mode: several providers at once, first valid image wins
+        report('generating', 30)
+        result, failures = race_providers(models, candidate)
+        if result is None:
+            return {'error': 'No image provider could generate this design: ' + '; '.join(failures)}, 503
+        model = result['model']
+
+    if result['cached_path']:
+        image_path = upload_url(result['cached_path'], host_url)
+    else:
+        # Save image to disk
+        report('saving', 90)
+        image_path = save_image_to_disk(result['image_bytes'], host_url=host_url)
+        image_cache.store(result['cache_key'], f"designs/{os.path.basename(image_path)}",
+                          len(result['image_bytes']))
+
+    # Save to conversation
+    conv = ensure_conversation(account_id, conv_id, prompt)
+    add_chat_message(conv.id, 'user', prompt)
+    add_chat_message(conv.id, 'assistant', 'Generated design', image_url=image_path)
+    conv.updated_at = datetime.utcnow()
+
+    db.session.commit()
+
+    return {
+        'success': True,
+        'image': image_path,
+        'prompt': prompt,
+        'model': model,
+        'conversation_id': conv.id,
+        'cached': bool(result['cached_path']),
+        'message': 'Image generated successfully',
+    }, 200
+
+
+def build_final_prompt(model, prompt, params, input_image_bytes=None):
+    """Provider prompt for ``model``; Gemini gets an enhanced or photo-referencing prompt."""
+    if model == 'gemini-enhanced':
+        if input_image_bytes:
+            # Image input: build a prompt that references the uploaded photo
+            return (
+                f"Look at this photo of me. {prompt or 'Choose the best dress for me and show it worn on me.'} "
+                f"Generate a photorealistic image of me wearing the recommended outfit. "
+                f"Keep my face and body from the original photo. "
+                f"Make it look natural, like a real photo."
+            )
+        enhanced = enhance_prompt_with_gemini(prompt, params)
+        return enhanced if enhanced else build_dress_prompt(prompt, params)
+    return build_dress_prompt(prompt, params)
+
+
+def prepare_and_fetch(model, prompt, params, input_image_bytes=None, input_image_url=None,
+                      fresh=False, report=None):
+    """
+    Build the final prompt for ``model`` and obtain an image for it, from the
+    image cache when possible and from the provider otherwise. Nothing is
+    written to disk here so race losers can simply be discarded.
+
+    Returns:
+        dict with model, final_prompt, cache_key, cached_path, image_bytes, error and status
+    """
+    final_prompt = build_final_prompt(model, prompt, params, input_image_bytes)
+    result = {
+        'model': model,
+        'final_prompt': final_prompt,
+        'cache_key': ImageCache.make_key(model, final_prompt, input_image_bytes),
+        'cached_path': None,
+        'image_bytes': None,
+        'error': None,
+        'status': 200,
+    }
+
+    # Serve repeat requests from the content-addressed cache
+    if not fresh:
+        result['cached_path'] = image_cache.lookup(result['cache_key'], current_app.config['UPLOAD_FOLDER'])
+        if result['cached_path']:
+            return result
+
+    # Hit the image provider; identical requests already in flight share that
+    # call, and save_image_to_disk stores the shared bytes under one file name
+    if report:
+        report('generating', 30)
+    (result['image_bytes'], result['error'], result['status']), shared = image_flights.do(
+        result['cache_key'],
+        lambda: fetch_image_from_provider(model, final_prompt, input_image_bytes, input_image_url, report=report))
+    if shared and report:
+        report('generating', 80, 'Joined an identical request already in progress')
+    return result
+
+
+def needs_input_url(model):
+    """True for providers that fetch the input photo by URL (Pollinations)."""
+    return model != 'gemini-enhanced' and not model.startswith('subnp-')
+
+
+def persist_in_background(image_bytes, subfolder, host_url):
+    """Write ``image_bytes`` with save_image_to_disk without holding up the request."""
+    app = current_app._get_current_object()
+
+    def save():
+        with app.app_context():
+            try:
+                save_image_to_disk(image_bytes, subfolder=subfolder, host_url=host_url)
+            except OSError as e:
+                print(f"Background save to {subfolder} failed: {e}")
+
+    _persist_executor.submit(save)
+
+
+def resolve_race_models(model, has_input_image=False):
+    """
+    Candidate list for race mode, or None for a single-provider request.
+
+    ``model`` may be "fastest" (the configured RACE_MODELS) or an ordered
+    list of model ids to try; lists must have passed check_image_model.
+    """
+    if isinstance(model, list):
+        return list(model)
+    if model != 'fastest':
+        return None
+    models = current_app.config['RACE_MODELS']
+    if has_input_image:
+        # SubNP cannot take an input photo
+        models = [m for m in models if not m.startswith('subnp-')]
+    return models
+
+
+def race_providers(models, candidate):
+    """
+    Run ``candidate(model)`` for up to RACE_WIDTH models concurrently, in list
+    order, starting the next model whenever one fails. The first result
+    without an error wins; later results are discarded.
+
+    Returns:
+        (result, failures) tuple; result is None if every model failed
+    """
+    app = current_app._get_current_object()
+    width = max(1, app.config['RACE_WIDTH'])
+
+    def run(candidate_model):
+        with app.app_context():
+            return candidate(candidate_model)
+
+    executor = ThreadPoolExecutor(max_workers=width, thread_name_prefix='image-race')
+    pending = list(models)
+    running = {}
+    failures = []
     try:
-        resp = requests.get(f"{SUBNP_BASE_URL}/api/free/models", timeout=10)
-        if resp.ok:
-            for m in resp.json().get('models', []):
-                image_models.append({'id': f"subnp-{m['model']}", 'name': f"SubNP ({m['model']})",
-                               'provider': m.get('provider', 'SubNP'), 'type': 'image',
-                               'requires_key': False, 'key_configured': True, 'supports_image_input': False})
+        while pending or running:
+            while pending and len(running) < width:
+                candidate_model = pending.pop(0)
+                running[executor.submit(run, candidate_model)] = candidate_model
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                candidate_model = running.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = {'error': str(e)}
+                if not result['error']:
+                    return result, failures
+                failures.append(f"{candidate_model}: {result['error']}")
+        return None, failures
+    finally:
+        # Providers still in flight cannot be interrupted; let them finish in
+        # the background and drop their results.
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def provider_for(model):
+    """Circuit breaker name for the provider behind an image model id."""
+    if model == 'gemini-enhanced':
+        return 'google'
+    if model.startswith('subnp-'):
+        return 'subnp'
+    return 'pollinations'
+
+
+def fetch_image_from_provider(model, final_prompt, input_image_bytes=None, input_image_url=None, report=None):
+    """
+    Dispatch a generation to the provider behind ``model``. ``report`` receives
+    provider progress events where the provider streams them (SubNP).
+
+    Calls go through the provider's circuit breaker: while it is open the
+    request fails at once instead of waiting for the provider timeout.
+
+    Returns:
+        (image_bytes, error, status) tuple; error is a user-facing message when generation failed
+    """
+    if model == 'gemini-enhanced' and not current_app.config.get('GOOGLE_API_KEY'):
+        return None, 'Google Imagen is not available. GOOGLE_API_KEY is not configured. Please select another model.', 503
+
+    breaker = provider_health.breaker(provider_for(model))
+    if not breaker.allow():
+        return None, (f'Model "{model}" is temporarily unavailable after repeated provider failures; '
+                      f'retry in {breaker.retry_after()}s or select another model.'), 503
+
+    start = time.monotonic()
+    image_bytes, error, status = _call_image_provider(model, final_prompt, input_image_bytes, input_image_url, report)
+    breaker.record(error is None, time.monotonic() - start)
+    return image_bytes, error, status
+
+
+def _subnp_progress(report):
+    """Forward SubNP stream events to a generation ``report`` callback."""
+    def on_progress(event):
+        report('generating', None, event.get('message') or event.get('status'))
+    return on_progress
+
+
+def _call_image_provider(model, final_prompt, input_image_bytes, input_image_url, report):
+    if model == 'gemini-enhanced':
+        image_bytes, error = fetch_google_imagen(final_prompt, input_image_bytes)
+        if error:
+            return None, f'Google Imagen is not available: {error}. Please select another model.', 503
+    elif model.startswith('subnp-'):
+        on_progress = _subnp_progress(report) if report else None
+        image_bytes, error = fetch_subnp_image(final_prompt, model.split('-', 1)[1], on_progress)
+        if error:
+            return None, f'SubNP is not available: {error}. Please select another model.', 503
+    else:
+        image_bytes, error = fetch_pollinations_image(final_prompt, input_image_url)
+        if error:
+            return None, f'Pollinations is not available: {error}. Please select another model.', 503
+
+    if not image_bytes or len(image_bytes) <= MIN_IMAGE_BYTES:
+        return None, f'Model "{model}" failed to generate an image. Please select another model.', 500
+    return image_bytes, None, 200
+
+
+def generate_batch_for_account(account_id, data, host_url, progress=None):
+    """
+    Generate one design per entry in ``data['variants']`` (param overrides on
+    top of ``data['params']``) concurrently, then save every result and write
+    all chat messages in a single transaction.
+
+    Returns:
+        (body, status) tuple; body is a JSON-serialisable dict
+    """
+    prompt = data.get('prompt', '')
+    base_params = data.get('params', {})
+    model = data.get('model', 'pollinations')
+    variants = data['variants']
+    fresh = bool(data.get('fresh'))
+    concurrency = min(int(data.get('concurrency') or current_app.config['BATCH_MAX_CONCURRENCY']),
+                      current_app.config['BATCH_MAX_CONCURRENCY'])
+    app = current_app._get_current_object()
+
+    def run(overrides):
+        with app.app_context():
+            params = dict(base_params, **overrides)
+            models = resolve_race_models(model)
+            if models is None:
+                return prepare_and_fetch(model, prompt, params, fresh=fresh)
+            result, failures = race_providers(
+                models, lambda candidate_model: prepare_and_fetch(candidate_model, prompt, params, fresh=fresh))
+            return result or {'error': '; '.join(failures), 'status': 503}
+
+    if progress:
+        progress('generating', 30)
+    with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix='image-batch') as executor:
+        results = list(executor.map(run, variants))
+
+    if progress:
+        progress('saving', 90)
+    conv = ensure_conversation(account_id, data.get('conversation_id'), prompt, commit=False)
+    add_chat_message(conv.id, 'user', prompt)
+    items = []
+    for overrides, result in zip(variants, results):
+        if result['error']:
+            items.append({'params': overrides, 'error': result['error']})
+            continue
+        if result['cached_path']:
+            image_path = upload_url(result['cached_path'], host_url)
         else:
-            for m in ['turbo', 'flux', 'magic']:
-                image_models.append({'id': f"subnp-{m}", 'name': f"SubNP ({m})",
-                               'provider': 'SubNP', 'type': 'image',
-                               'requires_key': False, 'key_configured': True, 'supports_image_input': False})
+            image_path = save_image_to_disk(result['image_bytes'], host_url=host_url)
+            image_cache.store(result['cache_key'], f"designs/{os.path.basename(image_path)}",
+                              len(result['image_bytes']))
+        add_chat_message(conv.id, 'assistant', 'Generated design variant', image_url=image_path)
+        items.append({'params': overrides, 'image': image_path, 'model': result['model'],
+                      'cached': bool(result['cached_path'])})
+    conv.updated_at = datetime.utcnow()
+    db.session.commit()
+
+    generated = sum(1 for item in items if 'image' in item)
+    return {
+        'success': generated > 0,
+        'prompt': prompt,
+        'conversation_id': conv.id,
+        'variants': items,
+        'generated': generated,
+        'message': f'Generated {generated} of {len(variants)} variants',
+    }, 200 if generated else 503
+
+
+def run_generation_job(job, generate, account_id, data, host_url):
+    """Job-queue entry point for the generate_*_for_account functions."""
+    try:
+        return generate(account_id, data, host_url, progress=job.update)
     except Exception:
-        for m in ['turbo', 'flux', 'magic']:
-            image_models.append({'id': f"subnp-{m}", 'name': f"SubNP ({m})",
-                           'provider': 'SubNP', 'type': 'image',
-                           'requires_key': False, 'key_configured': True, 'supports_image_input': False})
+        db.session.rollback()
+        raise
+
 
-    return jsonify({'text_models': text_models, 'image_models': image_models}), 200
+def submit_generation_job(kind, generate, account_id, data):
+    try:
+        job = job_queue.submit(account_id, kind, run_generation_job,
+                               generate, account_id, data, request.host_url)
+    except QueueFullError as e:
+        return jsonify({'error': str(e)}), 503
+    return jsonify({
+        'success': True,
+        'job_id': job.id,
+        'status': job.status,
+        'status_url': f"{request.host_url}api/ai/jobs/{job.id}",
+    }), 202
 
 
 @ai_bp.route('/generate-image', methods=['POST'])
@@ -157,92 +627,101 @@ def list_models():
 def generate_image():
     try:
         account_id = get_jwt_identity()
-        data = request.get_json()
+        try:
+            data = read_generation_payload()
+        except ValueError as e:
+            return jsonify({'error': f'Invalid form data: {e}'}), 400
         if not data or not data.get('prompt'):
             return jsonify({'error': 'Missing prompt'}), 400
+        try:
+            check_image_model(data.get('model', 'pollinations'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
 
-        prompt = data.get('prompt', '')
-        params = data.get('params', {})
-        model = data.get('model', 'pollinations')
-        conv_id = data.get('conversation_id')
-        input_image = data.get('input_image')
+        denied = rate_limiter.admit(account_id)
+        if denied is not None:
+            return denied
 
-        # Save uploaded image to disk if provided
-        input_image_url = None
-        if input_image:
-            image_bytes = base64.b64decode(input_image.split(',')[1] if ',' in input_image else input_image)
-            input_image_url = save_image_to_disk(image_bytes, subfolder='uploads')
+        # Job mode: hand the work to the background queue and return at once
+        if data.get('async'):
+            return submit_generation_job('generate-image', generate_image_for_account, account_id, data)
 
-        # Generate the image
-        input_image_bytes = None
-        if input_image_url:
-            # Read back the saved image for passing to Gemini
-            upload_path = os.path.join(current_app.config['UPLOAD_FOLDER'], 'uploads',
-                                       os.path.basename(input_image_url))
-            if os.path.exists(upload_path):
-                with open(upload_path, 'rb') as f:
-                    input_image_bytes = f.read()
-
-        if model == 'gemini-enhanced':
-            if input_image_bytes:
-                # Image input: build a prompt that references the uploaded photo
-                final_prompt = (
-                    f"Look at this photo of me. {prompt or 'Choose the best dress for me and show it worn on me.'} "
-                    f"Generate a photorealistic image of me wearing the recommended outfit. "
-                    f"Keep my face and body from the original photo. "
-                    f"Make it look natural, like a real photo."
-                )
-            else:
-                enhanced = enhance_prompt_with_gemini(prompt, params)
-                final_prompt = enhanced if enhanced else build_dress_prompt(prompt, params)
-        else:
-            final_prompt = build_dress_prompt(prompt, params)
-
-        # Hit the image provider
-        if model == 'gemini-enhanced':
-            api_key = current_app.config.get('GOOGLE_API_KEY')
-            if not api_key:
-                return jsonify({'error': 'Google Imagen is not available. GOOGLE_API_KEY is not configured. Please select another model.'}), 503
-            image_bytes, error = fetch_google_imagen(final_prompt, input_image_bytes)
-            if error:
-                return jsonify({'error': f'Google Imagen is not available: {error}. Please select another model.'}), 503
-        elif model.startswith('subnp-'):
-            image_bytes, error = fetch_subnp_image(final_prompt, model.split('-', 1)[1])
-            if error:
-                return jsonify({'error': f'SubNP is not available: {error}. Please select another model.'}), 503
-        else:
-            image_bytes, error = fetch_pollinations_image(final_prompt, input_image_url)
-            if error:
-                return jsonify({'error': f'Pollinations is not available: {error}. Please select another model.'}), 503
+        body, status = generate_image_for_account(account_id, data, request.host_url)
+        return jsonify(body), status
 
-        if not image_bytes:
-            return jsonify({'error': f'Model "{model}" failed to generate an image. Please select another model.'}), 500
+    except Exception as e:
+        db.session.rollback()
+        import traceback
+        print(f"Image generation error: {traceback.format_exc()}")
+        return jsonify({'error': f'Image generation failed: {str(e)}'}), 500
 
-        # Save image to disk
-        image_path = save_image_to_disk(image_bytes)
 
-        # Save to conversation
-        conv = ensure_conversation(account_id, conv_id, prompt)
-        add_chat_message(conv.id, 'user', prompt)
-        add_chat_message(conv.id, 'assistant', 'Generated design', image_url=image_path)
-        conv.updated_at = datetime.utcnow()
+@ai_bp.route('/generate-batch', methods=['POST'])
+@jwt_required()
+def generate_batch():
+    try:
+        account_id = get_jwt_identity()
+        data = request.get_json()
+        if not data or not data.get('prompt'):
+            return jsonify({'error': 'Missing prompt'}), 400
+        try:
+            check_image_model(data.get('model', 'pollinations'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        variants = data.get('variants')
+        if not isinstance(variants, list) or not variants or not all(isinstance(v, dict) for v in variants):
+            return jsonify({'error': 'variants must be a non-empty list of param overrides'}), 400
+        max_variants = current_app.config['BATCH_MAX_VARIANTS']
+        if len(variants) > max_variants:
+            return jsonify({'error': f'At most {max_variants} variants per batch'}), 400
+        if data.get('concurrency') is not None:
+            try:
+                if int(data['concurrency']) < 1:
+                    raise ValueError
+            except (TypeError, ValueError):
+                return jsonify({'error': 'concurrency must be a positive integer'}), 400
 
-        db.session.commit()
+        # One rate-limit token per variant, so a batch can be at most one burst
+        max_cost = rate_limiter.max_cost(account_id)
+        if max_cost is not None and len(variants) > max_cost:
+            return jsonify({'error': f'At most {max_cost} variants per batch for this account'}), 400
+        denied = rate_limiter.admit(account_id, cost=len(variants))
+        if denied is not None:
+            return denied
 
-        return jsonify({
-            'success': True,
-            'image': image_path,
-            'prompt': prompt,
-            'model': model,
-            'conversation_id': conv.id,
-            'message': 'Image generated successfully',
-        }), 200
+        if data.get('async'):
+            return submit_generation_job('generate-batch', generate_batch_for_account, account_id, data)
+
+        body, status = generate_batch_for_account(account_id, data, request.host_url)
+        return jsonify(body), status
 
     except Exception as e:
         db.session.rollback()
         import traceback
-        print(f"Image generation error: {traceback.format_exc()}")
-        return jsonify({'error': f'Image generation failed: {str(e)}'}), 500
+        print(f"Batch generation error: {traceback.format_exc()}")
+        return jsonify({'error': f'Batch generation failed: {str(e)}'}), 500
+
+
+@ai_bp.route('/cache/stats', methods=['GET'])
+@jwt_required()
+def cache_stats():
+    return jsonify({
+        'image_cache': image_cache.stats(),
+        'image_flights': image_flights.stats(),
+        'prompt_cache': prompt_cache.stats(),
+        'response_cache': response_cache.stats(),
+        'account_cache': account_cache.stats(),
+    }), 200
+
+
+@ai_bp.route('/jobs/<job_id>', methods=['GET'])
+@jwt_required()
+def get_job(job_id):
+    job = job_queue.get(job_id, account_id=get_jwt_identity())
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job.to_dict()), 200
 
 
 def fetch_pollinations_image(prompt, input_image_url=None):
@@ -251,8 +730,8 @@ def fetch_pollinations_image(prompt, input_image_url=None):
         params = {}
         if input_image_url:
             params['image'] = input_image_url
-        resp = requests.get(url, params=params, timeout=60)
-        if resp.status_code == 200 and len(resp.content) > 1000:
+        resp = provider_clients.session('pollinations').get(url, params=params, timeout=provider_clients.timeout())
+        if resp.status_code == 200 and len(resp.content) > MIN_IMAGE_BYTES:
             return resp.content, None
         return None, f"Pollinations returned {resp.status_code}"
     except Exception as e:
@@ -265,15 +744,14 @@ def fetch_google_imagen(prompt, input_image_bytes=None):
         return None, 'GOOGLE_API_KEY not configured'
 
     try:
-        from google import genai
         from google.genai import types
-        client = genai.Client(api_key=api_key)
+        client = provider_clients.genai(api_key)
 
         contents = []
         if input_image_bytes:
             contents.append(types.Part.from_bytes(
                 data=input_image_bytes,
-                mime_type='image/png',
+                mime_type=sniff_mime(input_image_bytes) or 'image/png',
             ))
         contents.append(prompt)
 
@@ -295,34 +773,39 @@ def fetch_google_imagen(prompt, input_image_bytes=None):
         return None, f'Google Gemini failed: {str(e)}'
 
 
-def fetch_subnp_image(prompt, subnp_model='turbo'):
+def fetch_subnp_image(prompt, subnp_model='turbo', on_progress=None):
     try:
-        resp = requests.post(
+        session = provider_clients.session('subnp')
+        image_url = None
+        # The context manager hands the streamed connection back to the pool
+        # before the image download reuses it.
+        with session.post(
             f"{SUBNP_BASE_URL}/api/free/generate",
             json={'prompt': prompt, 'model': subnp_model},
-            stream=True, timeout=60,
-        )
-        if not resp.ok:
-            return None, f"SubNP API error: {resp.status_code}"
-
-        image_url = None
-        for line in resp.iter_lines(decode_unicode=True):
-            if not line or not line.startswith('data: '):
-                continue
-            try:
-                data = json.loads(line[6:])
-                if data.get('status') == 'complete':
-                    image_url = data.get('imageUrl')
-                    break
-                elif data.get('status') == 'error':
-                    return None, data.get('message', 'SubNP generation error')
-            except json.JSONDecodeError:
-                continue
+            stream=True, timeout=provider_clients.timeout(),
+        ) as resp:
+            if not resp.ok:
+                return None, f"SubNP API error: {resp.status_code}"
+
+            for line in resp.iter_lines(decode_unicode=True):
+                if not line or not line.startswith('data: '):
+                    continue
+                try:
+                    data = json.loads(line[6:])
+                    if data.get('status') == 'complete':
+                        image_url = data.get('imageUrl')
+                        break
+                    elif data.get('status') == 'error':
+                        return None, data.get('message', 'SubNP generation error')
+                    elif on_progress:
+                        on_progress(data)
+                except json.JSONDecodeError:
+                    continue
 
         if not image_url:
             return None, 'SubNP did not return an image URL.'
 
-        img_resp = requests.get(image_url, timeout=30)
+        img_resp = session.get(image_url, timeout=provider_clients.timeout(30))
         if img_resp.ok:
             return img_resp.content, None
         return None, 'Failed to download SubNP image'
@@ -335,6 +818,38 @@ def fetch_subnp_image(prompt, subnp_model='turbo'):
         return None, f'SubNP generation failed: {str(e)}'
 
 
+GROQ_SYSTEM_PROMPT = (
+    "Your name is MenteE AI. You are a fashion design assistant created by MenteE. "
+    "Help users with dress designs, outfit suggestions, fabric choices, color combinations, "
+    "and style advice. Be concise and helpful. "
+    "Always identify yourself as MenteE AI when asked your name. "
+    "Never invent a different name or persona."
+)
+
+
+def create_groq_completion(client, model, prompt, stream=False):
+    groq_model = 'llama-3.3-70b-versatile' if model == 'groq-llama' else 'gemma2-9b-it'
+    return client.chat.completions.create(
+        model=groq_model,
+        messages=[
+            {"role": "system", "content": GROQ_SYSTEM_PROMPT},
+            {"role": "user", "content": prompt},
+        ],
+        max_tokens=1024,
+        temperature=0.7,
+        stream=stream,
+    )
+
+
+def save_text_exchange(account_id, conv_id, prompt, reply):
+    conv = ensure_conversation(account_id, conv_id, prompt)
+    add_chat_message(conv.id, 'user', prompt)
+    add_chat_message(conv.id, 'assistant', reply)
+    conv.updated_at = datetime.utcnow()
+    db.session.commit()
+    return conv
+
+
 @ai_bp.route('/generate-text', methods=['POST'])
 @jwt_required()
 def generate_text():
@@ -343,51 +858,36 @@ def generate_text():
         data = request.get_json()
         if not data or not data.get('prompt'):
             return jsonify({'error': 'Missing prompt'}), 400
+        denied = rate_limiter.admit(account_id)
+        if denied is not None:
+            return denied
 
         prompt = data.get('prompt', '')
         model = data.get('model', 'groq-llama')
         conv_id = data.get('conversation_id')
 
-        groq_key = current_app.config.get('GROQ_API_KEY')
-        if not groq_key:
-            return jsonify({'error': 'Groq API key not configured.'}), 503
-
-        import groq
-        client = groq.Groq(api_key=groq_key)
-
-        groq_model = 'llama-3.3-70b-versatile' if model == 'groq-llama' else 'gemma2-9b-it'
-
-        system_msg = (
-            "Your name is MenteE AI. You are a fashion design assistant created by MenteE. "
-            "Help users with dress designs, outfit suggestions, fabric choices, color combinations, "
-            "and style advice. Be concise and helpful. "
-            "Always identify yourself as MenteE AI when asked your name. "
-            "Never invent a different name or persona."
-        )
+        # Answer repeated and near-identical questions without calling Groq
+        reply, match = (None, None) if data.get('fresh') else response_cache.lookup(model, prompt)
+        if reply is None:
+            groq_key = current_app.config.get('GROQ_API_KEY')
+            if not groq_key:
+                return jsonify({'error': 'Groq API key not configured.'}), 503
 
-        response = client.chat.completions.create(
-            model=groq_model,
-            messages=[
-                {"role": "system", "content": system_msg},
-                {"role": "user", "content": prompt},
-            ],
-            max_tokens=1024,
-            temperature=0.7,
-        )
+            client = provider_clients.groq(groq_key)
+            response = create_groq_completion(client, model, prompt)
 
-        reply = response.choices[0].message.content.strip()
+            reply = response.choices[0].message.content.strip()
+            response_cache.store(model, prompt, reply)
 
-        conv = ensure_conversation(account_id, conv_id, prompt)
-        add_chat_message(conv.id, 'user', prompt)
-        add_chat_message(conv.id, 'assistant', reply)
-        conv.updated_at = datetime.utcnow()
-        db.session.commit()
+        conv = save_text_exchange(account_id, conv_id, prompt, reply)
 
         return jsonify({
             'success': True,
             'text': reply,
             'model': model,
             'conversation_id': conv.id,
+            'cached': match is not None,
+            'cache_match': match,
         }), 200
 
     except Exception as e:
@@ -395,3 +895,137 @@ def generate_text():
         import traceback
         print(f"Text generation error: {traceback.format_exc()}")
         return jsonify({'error': f'Text generation failed: {str(e)}'}), 500
+
+
+# ============================================
+# Server-sent event (SSE) streaming variants
+# ============================================
+
+def sse_event(event, payload):
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+
+def sse_response(stream):
+    return Response(stream, mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',  # stop nginx from buffering the stream
+    })
+
+
+@ai_bp.route('/generate-image/stream', methods=['POST'])
+@jwt_required()
+def generate_image_stream():
+    """
+    Same as generate-image, but answers with an event stream: ``job`` right
+    away, ``progress`` events as stages and provider updates arrive, then
+    ``complete`` or ``error`` carrying the usual response body.
+    """
+    account_id = get_jwt_identity()
+    try:
+        data = read_generation_payload()
+    except ValueError as e:
+        return jsonify({'error': f'Invalid form data: {e}'}), 400
+    if not data or not data.get('prompt'):
+        return jsonify({'error': 'Missing prompt'}), 400
+    try:
+        check_image_model(data.get('model', 'pollinations'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    denied = rate_limiter.admit(account_id)
+    if denied is not None:
+        return denied
+
+    events = queue.Queue()
+
+    def generate_with_events(account_id, data, host_url, progress=None):
+        def forward(stage, pct=None, detail=None):
+            progress(stage, pct, detail)
+            events.put(('progress', {'stage': stage, 'progress': pct, 'detail': detail}))
+        try:
+            body, status = generate_image_for_account(account_id, data, host_url, progress=forward)
+        except Exception as e:
+            events.put(('error', {'error': f'Image generation failed: {str(e)}', 'status': 500}))
+            raise
+        events.put(('complete' if status < 400 else 'error', dict(body, status=status)))
+        return body, status
+
+    try:
+        job = job_queue.submit(account_id, 'generate-image', run_generation_job,
+                               generate_with_events, account_id, data, request.host_url)
+    except QueueFullError as e:
+        return jsonify({'error': str(e)}), 503
+
+    keepalive = current_app.config['SSE_KEEPALIVE']
+
+    def stream():
+        yield sse_event('job', {'job_id': job.id, 'status': job.status})
+        while True:
+            try:
+                event, payload = events.get(timeout=keepalive)
+            except queue.Empty:
+                yield ': keepalive\n\n'
+                continue
+            yield sse_event(event, payload)
+            if event in ('complete', 'error'):
+                return
+
+    return sse_response(stream())
+
+
+@ai_bp.route('/generate-text/stream', methods=['POST'])
+@jwt_required()
+def generate_text_stream():
+    """Same as generate-text, but streams Groq tokens as ``token`` events."""
+    account_id = get_jwt_identity()
+    data = request.get_json()
+    if not data or not data.get('prompt'):
+        return jsonify({'error': 'Missing prompt'}), 400
+    denied = rate_limiter.admit(account_id)
+    if denied is not None:
+        return denied
+
+    prompt = data.get('prompt', '')
+    model = data.get('model', 'groq-llama')
+    conv_id = data.get('conversation_id')
+
+    cached_reply, match = (None, None) if data.get('fresh') else response_cache.lookup(model, prompt)
+    client = None
+    if cached_reply is None:
+        groq_key = current_app.config.get('GROQ_API_KEY')
+        if not groq_key:
+            return jsonify({'error': 'Groq API key not configured.'}), 503
+        client = provider_clients.groq(groq_key)
+
+    def stream():
+        yield sse_event('start', {'model': model})
+        try:
+            if cached_reply is not None:
+                # Cache hit: the whole reply arrives as a single token event
+                reply = cached_reply
+                yield sse_event('token', {'text': reply})
+            else:
+                parts = []
+                for chunk in create_groq_completion(client, model, prompt, stream=True):
+                    delta = chunk.choices[0].delta.content if chunk.choices else None
+                    if delta:
+                        parts.append(delta)
+                        yield sse_event('token', {'text': delta})
+                reply = ''.join(parts).strip()
+                response_cache.store(model, prompt, reply)
+
+            conv = save_text_exchange(account_id, conv_id, prompt, reply)
+            yield sse_event('complete', {
+                'success': True,
+                'text': reply,
+                'model': model,
+                'conversation_id': conv.id,
+                'cached': match is not None,
+                'cache_match': match,
+            })
+        except Exception as e:
+            db.session.rollback()
+            import traceback
+            print(f"Text generation error: {traceback.format_exc()}")
+            yield sse_event('error', {'error': f'Text generation failed: {str(e)}'})
+
+    return sse_response(stream_with_context(stream()))
@@ -0,0 +1,298 @@
+"""
+Design archive routes: export and import an account's designs as a ZIP.
+
+Archive layout:
+    designs.ndjson          one JSON object per GownDesign/Design row
+    files/blobs/<key>       SVGs and thumbnails from the blob store
+    files/uploads/<path>    generated images referenced by image_url
+    manifest.json           format version and row counts (written last)
+"""
+import json
+import os
+import shutil
+import tempfile
+import traceback
+import uuid
+import zipfile
+from datetime import datetime
+from urllib.parse import urlparse
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from werkzeug.security import safe_join
+from app import db, blob_store
+from app.archive import iter_file, stream_zip
+from app.forms import body_limit
+from app.images import InvalidImageError, verify_image
+from app.models import Design, GownDesign
+from app.routes.ai import save_image_to_disk
+from app.storage import MIME_EXTENSIONS
+
+archive_bp = Blueprint('archive', __name__, url_prefix='/api/archive')
+
+ARCHIVE_FORMAT = 'dress-customizer-designs'
+ARCHIVE_VERSION = 1
+EXPORT_BATCH_SIZE = 200
+IMPORT_BATCH_SIZE = 500
+MAX_IMPORT_FILE_BYTES = 25 * 1024 * 1024
+
+# type -> (model, owner column name)
+KINDS = {
+    'gown_design': (GownDesign, 'account_id'),
+    'design': (Design, 'user_id'),
+}
+
+FIELDS = {
+    'name': str, 'prompt': str, 'color': str, 'pattern': str, 'neckline': str, 'texture': str,
+    'sleeve_length': float, 'train_length': float, 'texture_intensity': float, 'skirt_volume': float,
+}
+
+UPLOADS_PATH = '/api/uploads/'
+# Folders save_image_to_disk writes generated and input images to
+UPLOAD_SUBFOLDERS = ('designs', 'uploads')
+
+
+class ArchiveError(ValueError):
+    """Raised for archives that cannot be imported."""
+
+
+def _upload_relpath(image_url):
+    """Path under UPLOAD_FOLDER for images served by this app, else None."""
+    if not image_url:
+        return None
+    path = urlparse(image_url).path
+    if not path.startswith(UPLOADS_PATH) or path.startswith(UPLOADS_PATH + 'blobs/'):
+        return None
+    return path[len(UPLOADS_PATH):]
+
+
+def _export_members(account_id, upload_folder):
+    counts = {kind: 0 for kind in KINDS}
+    blob_keys = set()
+    upload_paths = set()
+
+    def ndjson_lines():
+        for kind, (model, owner) in KINDS.items():
+            query = (model.query.filter(getattr(model, owner) == account_id)
+                     .order_by(model.created_at, model.id)
+                     .yield_per(EXPORT_BATCH_SIZE))
+            for row in query:
+                record = {'type': kind}
+                record.update({field: getattr(row, field) for field in FIELDS})
+                record['created_at'] = row.created_at.isoformat()
+                record['updated_at'] = row.updated_at.isoformat()
+                record['image_url'] = row.image_url
+                for column in ('svg_key', 'thumbnail_key'):
+                    key = getattr(row, column)
+                    record[column.replace('_key', '_file')] = f'files/blobs/{key}' if key else None
+                    if key:
+                        blob_keys.add(key)
+                relpath = _upload_relpath(row.image_url)
+                record['image_file'] = f'files/uploads/{relpath}' if relpath else None
+                if relpath:
+                    upload_paths.add(relpath)
+                counts[kind] += 1
+                yield (json.dumps(record) + '\n').encode('utf-8')
+
+    yield 'designs.ndjson', ndjson_lines()
+
+    for key in sorted(blob_keys):
+        try:
+            yield f'files/blobs/{key}', iter_file(blob_store.open(key))
+        except (OSError, ValueError) as e:
+            print(f"Archive export: skipping blob {key}: {e}")
+
+    for relpath in sorted(upload_paths):
+        path = safe_join(upload_folder, relpath)
+        if path and os.path.isfile(path):
+            yield f'files/uploads/{relpath}', iter_file(open(path, 'rb'))
+
+    manifest = {
+        'format': ARCHIVE_FORMAT,
+        'version': ARCHIVE_VERSION,
+        'exported_at': datetime.utcnow().isoformat(),
+        'counts': counts,
+    }
+    yield 'manifest.json', [json.dumps(manifest).encode('utf-8')]
+
+
+@archive_bp.route('/designs', methods=['GET'])
+@jwt_required()
+def export_designs():
+    """Stream the current account's designs and their files as a ZIP."""
+    account_id = get_jwt_identity()
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+    filename = f"designs-{datetime.utcnow():%Y%m%d-%H%M%S}.zip"
+    return Response(
+        stream_with_context(stream_zip(_export_members(account_id, upload_folder))),
+        mimetype='application/zip',
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'},
+    )
+
+
+def _read_member(zf, name):
+    try:
+        info = zf.getinfo(name)
+    except KeyError as e:
+        raise ArchiveError(f'Missing archive member: {name}') from e
+    if info.file_size > MAX_IMPORT_FILE_BYTES:
+        raise ArchiveError(f'Archive member too large: {name}')
+    return zf.read(info)
+
+
+def _parse_timestamp(value, line_no):
+    try:
+        return datetime.fromisoformat(value) if value else datetime.utcnow()
+    except (TypeError, ValueError) as e:
+        raise ArchiveError(f'Line {line_no}: invalid timestamp') from e
+
+
+def _looks_like_svg(data):
+    try:
+        text = data.decode('utf-8-sig').lstrip()
+    except UnicodeDecodeError:
+        return False
+    return text.startswith('<') and '<svg' in text[:4096].lower()
+
+
+class _Importer:
+    """Turns archive records into row mappings and inserts them in batches."""
+
+    def __init__(self, zf, account_id, host_url):
+        self.zf = zf
+        self.account_id = account_id
+        self.host_url = host_url
+        self.pending = {kind: [] for kind in KINDS}
+        self.counts = {kind: 0 for kind in KINDS}
+        self._stored = {}  # archive member -> blob key or image URL
+
+    def add(self, record, line_no):
+        kind = record.get('type')
+        if kind not in KINDS:
+            raise ArchiveError(f'Line {line_no}: unknown type {kind!r}')
+        model, owner = KINDS[kind]
+
+        row = {'id': str(uuid.uuid4()), owner: self.account_id}
+        for field, cast in FIELDS.items():
+            value = record.get(field)
+            if value is None:
+                continue
+            try:
+                row[field] = cast(value)
+            except (TypeError, ValueError) as e:
+                raise ArchiveError(f'Line {line_no}: invalid {field}') from e
+        if not row.get('name'):
+            raise ArchiveError(f'Line {line_no}: name is required')
+        row['created_at'] = _parse_timestamp(record.get('created_at'), line_no)
+        row['updated_at'] = _parse_timestamp(record.get('updated_at'), line_no)
+        row['svg_key'] = self._blob(record.get('svg_file'), line_no, allow_svg=True)
+        row['thumbnail_key'] = self._blob(record.get('thumbnail_file'), line_no)
+        row['image_url'] = self._upload(record.get('image_file'), line_no) or record.get('image_url')
+
+        self.pending[kind].append(row)
+        if len(self.pending[kind]) >= IMPORT_BATCH_SIZE:
+            self.flush(kind)
+
+    def flush(self, kind=None):
+        for name in [kind] if kind else list(self.pending):
+            rows = self.pending[name]
+            if rows:
+                db.session.execute(db.insert(KINDS[name][0]), rows)
+                self.counts[name] += len(rows)
+                self.pending[name] = []
+
+    def _blob(self, member, line_no, allow_svg=False):
+        # The extension decides the Content-Type the blob is served with, so
+        # it comes from the bytes, never from the member name
+        if not member:
+            return None
+        if member not in self._stored:
+            data = _read_member(self.zf, member)
+            if allow_svg and _looks_like_svg(data):
+                extension = 'svg'
+            else:
+                try:
+                    extension = MIME_EXTENSIONS[verify_image(data)]
+                except InvalidImageError as e:
+                    raise ArchiveError(f'Line {line_no}: {member} is not a supported image') from e
+            self._stored[member] = blob_store.put(data, extension)
+        return self._stored[member]
+
+    def _upload(self, member, line_no):
+        if not member:
+            return None
+        if member not in self._stored:
+            subfolder = os.path.dirname(member[len('files/uploads/'):])
+            if subfolder not in UPLOAD_SUBFOLDERS:
+                subfolder = 'designs'
+            data = _read_member(self.zf, member)
+            try:
+                verify_image(data)
+            except InvalidImageError as e:
+                raise ArchiveError(f'Line {line_no}: {member} is not a supported image') from e
+            self._stored[member] = save_image_to_disk(data, subfolder, self.host_url)
+        return self._stored[member]
+
+
+@archive_bp.route('/designs', methods=['POST'])
+@body_limit('ARCHIVE_MAX_CONTENT_LENGTH')
+@jwt_required()
+def import_designs():
+    """
+    Import an archive produced by the export endpoint into the current account.
+
+    Accepts a multipart ``archive`` file or a raw ``application/zip`` body.
+    Rows get new ids and are inserted in batches in one transaction.
+    """
+    account_id = get_jwt_identity()
+    upload = request.files.get('archive')
+    spooled = None
+    try:
+        if upload:
+            fileobj = upload.stream
+        else:
+            spooled = fileobj = tempfile.TemporaryFile()
+            shutil.copyfileobj(request.stream, spooled)
+            spooled.seek(0)
+
+        with zipfile.ZipFile(fileobj) as zf:
+            names = set(zf.namelist())
+            if 'designs.ndjson' not in names:
+                raise ArchiveError('Archive has no designs.ndjson')
+            if 'manifest.json' in names:
+                try:
+                    manifest = json.loads(_read_member(zf, 'manifest.json'))
+                except ValueError as e:
+                    raise ArchiveError('Invalid manifest.json') from e
+                if manifest.get('format') != ARCHIVE_FORMAT or manifest.get('version', 0) > ARCHIVE_VERSION:
+                    raise ArchiveError('Unsupported archive format')
+
+            importer = _Importer(zf, account_id, request.host_url)
+            with zf.open('designs.ndjson') as lines:
+                for line_no, line in enumerate(lines, start=1):
+                    if not line.strip():
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except ValueError as e:
+                        raise ArchiveError(f'Line {line_no}: invalid JSON') from e
+                    if not isinstance(record, dict):
+                        raise ArchiveError(f'Line {line_no}: expected an object')
+                    importer.add(record, line_no)
+            importer.flush()
+
+        db.session.commit()
+        return jsonify({
+            'message': 'Designs imported successfully',
+            'imported': importer.counts,
+        }), 201
+
+    except (zipfile.BadZipFile, ArchiveError) as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        print(traceback.format_exc())
+        return jsonify({'error': str(e)}), 500
+    finally:
+        if spooled is not None:
+            spooled.close()
@@ -3,13 +3,18 @@ Authentication routes: signup, signin, token refresh.
 """
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
-from werkzeug.security import generate_password_hash, check_password_hash
-from app import db
+from app import db, account_cache, password_hasher
 from app.models import Account
 
 auth_bp = Blueprint('auth', __name__)
 
 
+def load_account_snapshot(account_id):
+    """AccountCache loader: the account's ``to_dict()``, or None if it does not exist."""
+    account = db.session.get(Account, account_id)
+    return account.to_dict() if account else None
+
+
 @auth_bp.route('/signup', methods=['POST'])
 def signup():
     """Register a new account."""
@@ -31,7 +36,7 @@ def signup():
         # Create new account
         account = Account(
             email=data['email'],
-            password_hash=generate_password_hash(data['password']),
+            password_hash=password_hasher.hash(data['password']),
             first_name=data.get('firstName', ''),
             last_name=data.get('lastName', ''),
             phone=data.get('phone', ''),
@@ -66,9 +71,18 @@ def signin():
         # Find account
         account = Account.query.filter_by(email=data['email']).first()
         
-        if not account or not check_password_hash(account.password_hash, data['password']):
+        if not account or not password_hasher.verify(account.password_hash, data['password']):
             return jsonify({'error': 'Invalid credentials'}), 401
         
+        # Upgrade hashes made with an older method or cost while we have the password
+        if password_hasher.needs_rehash(account.password_hash):
+            try:
+                account.password_hash = password_hasher.hash(data['password'])
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                print(f"Password rehash failed for {account.id}: {e}")
+        
         # Generate access token
         access_token = create_access_token(identity=account.id)
         
@@ -87,12 +101,12 @@ def signin():
 def verify():
     """Verify JWT token is valid."""
     account_id = get_jwt_identity()
-    account = Account.query.get(account_id)
+    account = account_cache.get(account_id)
     
     if not account:
         return jsonify({'error': 'Account not found'}), 404
     
     return jsonify({
         'valid': True,
-        'account': account.to_dict()
+        'account': account
     }), 200
@@ -1,10 +1,13 @@
 """
-Conversation routes: list, get, delete chat history.
+Conversation routes: list, get, page through messages, delete chat history.
 """
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy import func
 from app import db
-from app.models import Conversation
+from app.models import Conversation, ChatMessage
+from app.pagination import (InvalidCursorError, encode_cursor, keyset_page, page_args,
+                            search_filter, wants_total)
 
 conversations_bp = Blueprint('conversations', __name__, url_prefix='/api/conversations')
 
@@ -13,8 +16,30 @@ conversations_bp = Blueprint('conversations', __name__, url_prefix='/api/convers
 @jwt_required()
 def list_conversations():
     account_id = get_jwt_identity()
-    convs = Conversation.query.filter_by(account_id=account_id).order_by(Conversation.updated_at.desc()).all()
-    return jsonify({'conversations': [c.to_dict() for c in convs]}), 200
+    owned = Conversation.query.filter_by(account_id=account_id)
+    query = search_filter(owned, request.args.get('q'), Conversation.title)
+    try:
+        cursor, limit = page_args(request.args)
+        convs, next_cursor = keyset_page(query, Conversation.updated_at, Conversation.id,
+                                         cursor, limit)
+    except InvalidCursorError as e:
+        return jsonify({'error': str(e)}), 400
+
+    # One grouped query for all message counts instead of loading every message
+    counts = dict(
+        db.session.query(ChatMessage.conversation_id, func.count(ChatMessage.id))
+        .filter(ChatMessage.conversation_id.in_([c.id for c in convs]))
+        .group_by(ChatMessage.conversation_id)
+        .all()
+    ) if convs else {}
+    body = {
+        'conversations': [c.to_dict(message_count=counts.get(c.id, 0)) for c in convs],
+        'next_cursor': next_cursor,
+    }
+    # The count is opt-in (first page only) so paging stays within the query budget
+    if wants_total(request.args):
+        body['total'] = owned.count()
+    return jsonify(body), 200
 
 
 @conversations_bp.route('/<conv_id>', methods=['GET'])
@@ -27,6 +52,49 @@ def get_conversation(conv_id):
     return jsonify(conv.to_dict(include_messages=True)), 200
 
 
+@conversations_bp.route('/<conv_id>/messages', methods=['GET'])
+@jwt_required()
+def list_messages(conv_id):
+    """
+    Page through a conversation's messages, returned oldest first.
+
+    Without a cursor this returns the newest ``limit`` messages. Pass
+    ``before=<older_cursor>`` to load earlier history on scroll, or
+    ``after=<newer_cursor>`` to fetch messages added since the last call.
+    """
+    account_id = get_jwt_identity()
+    conv = Conversation.query.filter_by(id=conv_id, account_id=account_id).first()
+    if not conv:
+        return jsonify({'error': 'Conversation not found'}), 404
+
+    before = request.args.get('before') or None
+    after = request.args.get('after') or None
+    if before and after:
+        return jsonify({'error': 'Pass either before or after, not both'}), 400
+
+    query = ChatMessage.query.filter_by(conversation_id=conv.id)
+    try:
+        _, limit = page_args(request.args)
+        if after:
+            messages, more = keyset_page(query, ChatMessage.created_at, ChatMessage.id,
+                                         after, limit, ascending=True)
+        else:
+            messages, more = keyset_page(query, ChatMessage.created_at, ChatMessage.id, before, limit)
+            messages.reverse()
+    except InvalidCursorError as e:
+        return jsonify({'error': str(e)}), 400
+
+    last = messages[-1] if messages else None
+    return jsonify({
+        'messages': [m.to_dict() for m in messages],
+        # Cursor for the next page of older history; None once the start is reached
+        'older_cursor': None if after else more,
+        # Cursor to poll for newer messages; kept stable when nothing new arrived
+        'newer_cursor': encode_cursor(last.created_at, last.id) if last else after,
+        'has_more': more is not None,
+    }), 200
+
+
 @conversations_bp.route('/<conv_id>', methods=['DELETE'])
 @jwt_required()
 def delete_conversation(conv_id):
@@ -3,8 +3,10 @@ Design routes: CRUD operations for dress designs.
 """
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app import db
+from app import db, provider_clients, blob_store
+from app.forms import request_payload, store_upload
 from app.models import Design
+from app.pagination import InvalidCursorError, keyset_page, page_args
 import os
 import io
 import base64
@@ -27,8 +29,7 @@ def generate_image():
         if not api_key:
             return jsonify({'error': 'Google Imagen is not available. GOOGLE_API_KEY is not configured.'}), 503
 
-        from google import genai
-        client = genai.Client(api_key=api_key)
+        client = provider_clients.genai(api_key)
 
         response = client.models.generate_content(
             model='gemini-3.1-flash-lite-image',
@@ -75,15 +76,20 @@ def modify_image():
 @designs_bp.route('', methods=['GET'])
 @jwt_required()
 def get_designs():
-    """Get all designs for the current user."""
+    """Get the current user's designs, newest first, one keyset page at a time."""
     try:
         user_id = get_jwt_identity()
-        designs = Design.query.filter_by(user_id=user_id).order_by(Design.created_at.desc()).all()
+        cursor, limit = page_args(request.args)
+        designs, next_cursor = keyset_page(Design.query.filter_by(user_id=user_id),
+                                           Design.created_at, Design.id, cursor, limit)
 
         return jsonify({
-            'designs': [d.to_dict() for d in designs]
+            'designs': [d.to_dict() for d in designs],
+            'next_cursor': next_cursor
         }), 200
 
+    except InvalidCursorError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -111,11 +117,15 @@ def create_design():
     """Create a new design."""
     try:
         user_id = get_jwt_identity()
-        data = request.get_json()
+        data, files = request_payload()
 
         if not data or not data.get('name'):
             return jsonify({'error': 'Missing required fields'}), 400
 
+        thumbnail_key = store_upload(files.get('thumbnail')) or blob_store.put_data_url(data.get('thumbnail'))
+        svg_key = store_upload(files.get('svg'), 'svg') or (
+            blob_store.put_text(data['svg'], 'svg') if data.get('svg') else None)
+
         design = Design(
             user_id=user_id,
             name=data.get('name'),
@@ -128,8 +138,8 @@ def create_design():
             texture=data.get('texture', 'satin'),
             texture_intensity=float(data.get('texture_intensity', 40)),
             skirt_volume=float(data.get('skirt_volume', 60)),
-            svg=data.get('svg'),
-            thumbnail=data.get('thumbnail')
+            svg_key=svg_key,
+            thumbnail_key=thumbnail_key
         )
 
         db.session.add(design)
@@ -140,6 +150,9 @@ def create_design():
             'design': design.to_dict()
         }), 201
 
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
@@ -1,18 +1,13 @@
 """
 Gown design routes: CRUD operations for dress designs.
 """
-import base64
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app import db
+from app import db, blob_store
+from app.forms import request_payload, store_upload
 from app.models import GownDesign
-
-
-def decode_base64_thumbnail(thumbnail_str):
-    """Decode base64 thumbnail string to bytes."""
-    if thumbnail_str and thumbnail_str.startswith('data:image/png;base64,'):
-        return base64.b64decode(thumbnail_str.split(',')[1])
-    return None
+from app.pagination import (InvalidCursorError, keyset_page, list_order, page_args,
+                            search_filter, wants_total)
 
 gown_designs_bp = Blueprint('gown_designs', __name__)
 
@@ -20,15 +15,31 @@ gown_designs_bp = Blueprint('gown_designs', __name__)
 @gown_designs_bp.route('', methods=['GET'])
 @jwt_required()
 def get_designs():
-    """Get all gown designs for the current account."""
+    """
+    Get the current account's gown designs one keyset page at a time.
+
+    ``q`` searches name and prompt, ``order`` is newest (default), oldest or
+    name, and ``total=1`` adds the account's design count.
+    """
     try:
         account_id = get_jwt_identity()
-        designs = GownDesign.query.filter_by(account_id=account_id).order_by(GownDesign.created_at.desc()).all()
+        cursor, limit = page_args(request.args)
+        sort_column, ascending = list_order(request.args, GownDesign.created_at, GownDesign.name)
+        owned = GownDesign.query.filter_by(account_id=account_id)
+        query = search_filter(owned, request.args.get('q'), GownDesign.name, GownDesign.prompt)
+        designs, next_cursor = keyset_page(query, sort_column, GownDesign.id,
+                                           cursor, limit, ascending)
         
-        return jsonify({
-            'designs': [d.to_dict() for d in designs]
-        }), 200
+        body = {
+            'designs': [d.to_dict() for d in designs],
+            'next_cursor': next_cursor
+        }
+        if wants_total(request.args):
+            body['total'] = owned.count()
+        return jsonify(body), 200
     
+    except InvalidCursorError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -44,7 +55,7 @@ def get_design(design_id):
         if not design:
             return jsonify({'error': 'Design not found'}), 404
         
-        # Include large fields (svg, thumbnail) for single design view
+        # Include the thumbnail field for single design view
         return jsonify(design.to_dict(include_large_fields=True)), 200
     
     except Exception as e:
@@ -57,15 +68,16 @@ def create_design():
     """Create a new gown design."""
     try:
         account_id = get_jwt_identity()
-        data = request.get_json()
+        data, files = request_payload()
         
         if not data or not data.get('name'):
             return jsonify({'error': 'Missing required fields'}), 400
         
-        # Decode thumbnail if it's a base64 data URL
-        thumbnail_binary = None
-        if data.get('thumbnail'):
-            thumbnail_binary = decode_base64_thumbnail(data.get('thumbnail'))
+        # Thumbnail and SVG go to the blob store: multipart file parts are
+        # streamed from their spooled temp file, JSON carries a data URL/markup
+        thumbnail_key = store_upload(files.get('thumbnail')) or blob_store.put_data_url(data.get('thumbnail'))
+        svg_key = store_upload(files.get('svg'), 'svg') or (
+            blob_store.put_text(data['svg'], 'svg') if data.get('svg') else None)
         
         design = GownDesign(
             account_id=account_id,
@@ -80,8 +92,8 @@ def create_design():
             texture_intensity=float(data.get('texture_intensity', 40)),
             skirt_volume=float(data.get('skirt_volume', 60)),
             image_url=data.get('image_url'),
-            svg=data.get('svg'),
-            thumbnail=thumbnail_binary
+            svg_key=svg_key,
+            thumbnail_key=thumbnail_key
         )
         
         db.session.add(design)
@@ -92,6 +104,9 @@ def create_design():
             'design': design.to_dict()
         }), 201
     
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
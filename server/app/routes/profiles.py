@@ -10,7 +10,7 @@ must come BEFORE generic routes (/<account_id>)
 """
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app import db
+from app import db, account_cache
 from app.models import Account, BodyProfile
 from datetime import datetime
 
@@ -341,6 +341,7 @@ def update_current_profile():
             body_profile.updated_at = datetime.utcnow()
         
         db.session.commit()
+        account_cache.invalidate(account.id)
         
         response_data = {
             'success': True,
@@ -453,6 +454,7 @@ def update_profile(account_id):
             body_profile.updated_at = datetime.utcnow()
         
         db.session.commit()
+        account_cache.invalidate(account.id)
         
         response_data = {
             'success': True,
@@ -508,6 +510,7 @@ def delete_current_profile():
         # Delete account (cascade deletes all related data)
         db.session.delete(account)
         db.session.commit()
+        account_cache.invalidate(deleted_account_id)
         
         return jsonify({
             'success': True,
@@ -556,6 +559,7 @@ def delete_profile(account_id):
         # Delete account (cascade deletes all related data)
         db.session.delete(account)
         db.session.commit()
+        account_cache.invalidate(deleted_account_id)
         
         return jsonify({
             'success': True,
@@ -5,6 +5,8 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
 from app.models import SavedStyle
+from app.pagination import (InvalidCursorError, keyset_page, list_order, page_args,
+                            search_filter, wants_total)
 
 styles_bp = Blueprint('styles', __name__, url_prefix='/api/styles')
 
@@ -13,8 +15,21 @@ styles_bp = Blueprint('styles', __name__, url_prefix='/api/styles')
 @jwt_required()
 def list_styles():
     account_id = get_jwt_identity()
-    styles = SavedStyle.query.filter_by(account_id=account_id).order_by(SavedStyle.created_at.desc()).all()
-    return jsonify({'styles': [s.to_dict() for s in styles]}), 200
+    owned = SavedStyle.query.filter_by(account_id=account_id)
+    query = search_filter(owned, request.args.get('q'), SavedStyle.name)
+    if request.args.get('category'):
+        query = query.filter_by(category=request.args['category'])
+    try:
+        cursor, limit = page_args(request.args)
+        sort_column, ascending = list_order(request.args, SavedStyle.created_at, SavedStyle.name)
+        styles, next_cursor = keyset_page(query, sort_column, SavedStyle.id,
+                                          cursor, limit, ascending)
+    except InvalidCursorError as e:
+        return jsonify({'error': str(e)}), 400
+    body = {'styles': [s.to_dict() for s in styles], 'next_cursor': next_cursor}
+    if wants_total(request.args):
+        body['total'] = owned.count()
+    return jsonify(body), 200
 
 
 @styles_bp.route('', methods=['POST'])
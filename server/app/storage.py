@@ -0,0 +1,156 @@
+"""
+Blob storage for design thumbnails and SVGs.
+
+Blobs are addressed by the sha256 of their content, so rows only keep a short
+key, identical uploads share one object and URLs never change content.
+"""
+import base64
+import hashlib
+import os
+import uuid
+from flask import has_request_context, request
+
+MIME_EXTENSIONS = {
+    'image/png': 'png',
+    'image/jpeg': 'jpg',
+    'image/webp': 'webp',
+    'image/gif': 'gif',
+    'image/svg+xml': 'svg',
+}
+
+
+def decode_base64_image(data_url):
+    """
+    Decode a ``data:image/...;base64,`` URL.
+
+    Returns:
+        (bytes, extension) tuple, or (None, None) if the value is not an image data URL
+    """
+    if not data_url or not data_url.startswith('data:image/') or ';base64,' not in data_url:
+        return None, None
+    header, encoded = data_url.split(',', 1)
+    mime = header[len('data:'):].split(';', 1)[0]
+    extension = MIME_EXTENSIONS.get(mime)
+    if extension is None:
+        return None, None
+    return base64.b64decode(encoded), extension
+
+
+class LocalStorage:
+    """Stores blobs as files under ``root``; served by the /api/uploads route."""
+
+    def __init__(self, root, url_path):
+        self.root = root
+        self.url_path = url_path.strip('/')
+
+    def put(self, data, extension):
+        digest = hashlib.sha256(data).hexdigest()
+        key = f"{digest[:2]}/{digest}.{extension}"
+        path = self.path(key)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        return key
+
+    def put_stream(self, fileobj, extension, chunk_size=64 * 1024):
+        """Like put(), but copies ``fileobj`` to disk in chunks while hashing it."""
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = os.path.join(self.root, f".{uuid.uuid4().hex}.tmp")
+        digest = hashlib.sha256()
+        try:
+            with open(tmp_path, 'wb') as f:
+                for chunk in iter(lambda: fileobj.read(chunk_size), b''):
+                    digest.update(chunk)
+                    f.write(chunk)
+            key = f"{digest.hexdigest()[:2]}/{digest.hexdigest()}.{extension}"
+            path = self.path(key)
+            if os.path.exists(path):
+                os.remove(tmp_path)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return key
+
+    def get(self, key):
+        with open(self.path(key), 'rb') as f:
+            return f.read()
+
+    def open(self, key):
+        return open(self.path(key), 'rb')
+
+    def exists(self, key):
+        return os.path.exists(self.path(key))
+
+    def delete(self, key):
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    def path(self, key):
+        path = os.path.normpath(os.path.join(self.root, key))
+        if not path.startswith(os.path.normpath(self.root) + os.sep):
+            raise ValueError(f'Invalid blob key: {key}')
+        return path
+
+    def url(self, key):
+        relative = f"/{self.url_path}/{key}"
+        if has_request_context():
+            return f"{request.host_url.rstrip('/')}{relative}"
+        return relative
+
+
+BACKENDS = {
+    'local': lambda app: LocalStorage(
+        os.path.join(app.config['UPLOAD_FOLDER'], 'blobs'), '/api/uploads/blobs'),
+}
+
+
+class BlobStore:
+    """Flask extension exposing the configured storage backend."""
+
+    def __init__(self, app=None):
+        self.backend = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        name = app.config.get('STORAGE_BACKEND', 'local')
+        if name not in BACKENDS:
+            raise ValueError(f'Unknown storage backend: {name}')
+        self.backend = BACKENDS[name](app)
+        app.extensions['blob_store'] = self
+
+    def put(self, data, extension):
+        return self.backend.put(data, extension)
+
+    def put_data_url(self, data_url):
+        """Store a base64 image data URL; returns the key or None if it is not one."""
+        data, extension = decode_base64_image(data_url)
+        if data is None:
+            return None
+        return self.put(data, extension)
+
+    def put_file(self, fileobj, extension):
+        """Store a file object without reading it into memory first."""
+        return self.backend.put_stream(fileobj, extension)
+
+    def put_text(self, text, extension):
+        return self.put(text.encode('utf-8'), extension)
+
+    def get(self, key):
+        return self.backend.get(key)
+
+    def open(self, key):
+        """Binary file object for ``key``, for streaming large blobs."""
+        return self.backend.open(key)
+
+    def url(self, key):
+        return self.backend.url(key) if key else None
@@ -0,0 +1,70 @@
+"""
+Serving files from UPLOAD_FOLDER with caching headers.
+
+Generated images and blobs are stored under names that never change content:
+a SHA-256 of the bytes or a random UUID. Those are sent with a one-year
+``immutable`` Cache-Control, so browsers and CDNs never revalidate them.
+Every response also carries an ETag and Last-Modified for 304 revalidation.
+
+UPLOADS_SERVE_MODE picks who sends the bytes:
+    direct       the Flask worker streams the file (default)
+    x-sendfile   Apache/lighttpd send it (X-Sendfile header)
+    x-accel      nginx sends it from an ``internal`` location mapped to
+                 UPLOADS_ACCEL_PREFIX (X-Accel-Redirect header)
+"""
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+from flask import abort, current_app, send_from_directory
+from werkzeug.security import safe_join
+from app.images import DERIVED_FOLDER
+
+SERVE_MODES = ('direct', 'x-sendfile', 'x-accel')
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+_SHA256_RE = re.compile(r'^[0-9a-f]{64}$')
+_UUID_RE = re.compile(r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$')
+
+
+def is_immutable(relpath):
+    """True for content-addressed (SHA-256) and UUID file names."""
+    stem = os.path.splitext(os.path.basename(relpath))[0]
+    return bool(_SHA256_RE.match(stem) or _UUID_RE.match(stem))
+
+
+def send_upload(relpath):
+    """Response for ``relpath`` under UPLOAD_FOLDER, honouring UPLOADS_SERVE_MODE."""
+    config = current_app.config
+    folder = config['UPLOAD_FOLDER']
+    path = safe_join(folder, relpath)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+
+    immutable = is_immutable(relpath)
+    max_age = IMMUTABLE_MAX_AGE if immutable else config.get('UPLOADS_MAX_AGE', 3600)
+
+    if config.get('UPLOADS_SERVE_MODE') == 'x-accel':
+        # nginx handles Range and conditional requests for the internal location
+        mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        response = current_app.response_class(mimetype=mimetype)
+        prefix = config.get('UPLOADS_ACCEL_PREFIX', '/protected-uploads').rstrip('/')
+        response.headers['X-Accel-Redirect'] = f"{prefix}/{quote(relpath)}"
+        response.cache_control.public = True
+        response.cache_control.max_age = max_age
+    else:
+        # A content hash is already a strong validator. Derivatives share their
+        # source's stem across formats, so they keep the stat-derived ETag.
+        stem = os.path.splitext(os.path.basename(relpath))[0]
+        original = not relpath.startswith(f"{DERIVED_FOLDER}/")
+        etag = stem if original and _SHA256_RE.match(stem) else True
+        response = send_from_directory(folder, relpath, max_age=max_age, etag=etag)
+        response.cache_control.public = True
+
+    if immutable:
+        response.cache_control.immutable = True
+    if relpath.endswith('.svg'):
+        # User-supplied SVG markup must never run scripts on our origin
+        response.headers['Content-Security-Policy'] = "default-src 'none'; style-src 'unsafe-inline'"
+        response.headers['X-Content-Type-Options'] = 'nosniff'
+    return response
@@ -0,0 +1,89 @@
+"""Move design thumbnails and SVGs out of the database into the blob store
+
+Revision ID: 476ce33c55f3
+Revises:
+Create Date: 2026-10-18 11:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from flask import current_app
+from app.storage import decode_base64_image
+
+
+# revision identifiers, used by Alembic.
+revision = '476ce33c55f3'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+TABLES = ('gown_designs', 'designs')
+
+
+def _thumbnail_bytes(value):
+    # designs.thumbnail historically received the raw data URL string
+    if value is None:
+        return None, None
+    if isinstance(value, memoryview):
+        value = value.tobytes()
+    if value.startswith(b'data:image/'):
+        return decode_base64_image(value.decode('utf-8'))
+    return value, 'png'
+
+
+def upgrade():
+    store = current_app.extensions['blob_store']
+    conn = op.get_bind()
+
+    for table in TABLES:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.add_column(sa.Column('svg_key', sa.String(length=255), nullable=True))
+            batch_op.add_column(sa.Column('thumbnail_key', sa.String(length=255), nullable=True))
+
+        # Fetch blobs one row at a time so memory stays flat on large tables
+        ids = conn.execute(sa.text(
+            f"SELECT id FROM {table} WHERE svg IS NOT NULL OR thumbnail IS NOT NULL"
+        )).scalars().all()
+        for row_id in ids:
+            svg, thumbnail = conn.execute(
+                sa.text(f"SELECT svg, thumbnail FROM {table} WHERE id = :id"), {'id': row_id}
+            ).one()
+            svg_key = store.put_text(svg, 'svg') if svg else None
+            data, extension = _thumbnail_bytes(thumbnail)
+            thumbnail_key = store.put(data, extension) if data else None
+            conn.execute(
+                sa.text(f"UPDATE {table} SET svg_key = :svg_key, thumbnail_key = :thumbnail_key WHERE id = :id"),
+                {'svg_key': svg_key, 'thumbnail_key': thumbnail_key, 'id': row_id},
+            )
+
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column('thumbnail')
+            batch_op.drop_column('svg')
+
+
+def downgrade():
+    store = current_app.extensions['blob_store']
+    conn = op.get_bind()
+
+    for table in TABLES:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.add_column(sa.Column('svg', sa.Text(), nullable=True))
+            batch_op.add_column(sa.Column('thumbnail', sa.LargeBinary(), nullable=True))
+
+        rows = conn.execute(sa.text(
+            f"SELECT id, svg_key, thumbnail_key FROM {table} "
+            f"WHERE svg_key IS NOT NULL OR thumbnail_key IS NOT NULL"
+        )).all()
+        for row_id, svg_key, thumbnail_key in rows:
+            conn.execute(
+                sa.text(f"UPDATE {table} SET svg = :svg, thumbnail = :thumbnail WHERE id = :id"),
+                {
+                    'svg': store.get(svg_key).decode('utf-8') if svg_key else None,
+                    'thumbnail': store.get(thumbnail_key) if thumbnail_key else None,
+                    'id': row_id,
+                },
+            )
+
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column('thumbnail_key')
+            batch_op.drop_column('svg_key')
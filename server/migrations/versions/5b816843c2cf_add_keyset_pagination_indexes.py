@@ -0,0 +1,29 @@
+"""Add composite indexes backing keyset pagination of per-account listings
+
+Revision ID: 5b816843c2cf
+Revises: 476ce33c55f3
+Create Date: 2026-10-18 12:05:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '5b816843c2cf'
+down_revision = '476ce33c55f3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_gown_designs_account_created', 'gown_designs', ['account_id', 'created_at', 'id'])
+    op.create_index('ix_designs_user_created', 'designs', ['user_id', 'created_at', 'id'])
+    op.create_index('ix_conversations_account_updated', 'conversations', ['account_id', 'updated_at', 'id'])
+    op.create_index('ix_saved_styles_account_created', 'saved_styles', ['account_id', 'created_at', 'id'])
+
+
+def downgrade():
+    op.drop_index('ix_saved_styles_account_created', table_name='saved_styles')
+    op.drop_index('ix_conversations_account_updated', table_name='conversations')
+    op.drop_index('ix_designs_user_created', table_name='designs')
+    op.drop_index('ix_gown_designs_account_created', table_name='gown_designs')
@@ -0,0 +1,31 @@
+"""Index audit: cover the remaining per-account access paths
+
+Every hot query filters by account_id/user_id (or conversation_id for chat
+messages) and orders by created_at/updated_at. After 5b816843c2cf the only
+unindexed path left is chat_messages by conversation, used by message
+listings, message counts and the conversation delete cascade.
+
+Verify with ``flask --app run explain-indexes``.
+
+Revision ID: 629591a65515
+Revises: 5b816843c2cf
+Create Date: 2026-10-18 12:40:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '629591a65515'
+down_revision = '5b816843c2cf'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_chat_messages_conversation_created', 'chat_messages',
+                    ['conversation_id', 'created_at', 'id'])
+
+
+def downgrade():
+    op.drop_index('ix_chat_messages_conversation_created', table_name='chat_messages')
@@ -0,0 +1,46 @@
+"""Add generation_jobs for JOB_STORE=database
+
+Background job state shared by all worker processes, so a job poll can be
+answered by any worker, not only the one that accepted the job.
+
+Revision ID: 8d2f41c7a9e3
+Revises: 629591a65515
+Create Date: 2026-10-18 16:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d2f41c7a9e3'
+down_revision = '629591a65515'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'generation_jobs',
+        sa.Column('id', sa.String(length=36), nullable=False),
+        sa.Column('account_id', sa.String(length=36), nullable=False),
+        sa.Column('kind', sa.String(length=50), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('stage', sa.String(length=50), nullable=False),
+        sa.Column('progress', sa.Integer(), nullable=False),
+        sa.Column('detail', sa.Text(), nullable=True),
+        sa.Column('result', sa.JSON(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('status_code', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.Float(), nullable=False),
+        sa.Column('updated_at', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_generation_jobs_account_id', 'generation_jobs', ['account_id'])
+    op.create_index('ix_generation_jobs_updated_at', 'generation_jobs', ['updated_at'])
+
+
+def downgrade():
+    op.drop_index('ix_generation_jobs_updated_at', table_name='generation_jobs')
+    op.drop_index('ix_generation_jobs_account_id', table_name='generation_jobs')
+    op.drop_table('generation_jobs')
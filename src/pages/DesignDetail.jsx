@@ -90,8 +90,8 @@ export default function DesignDetail() {
               <div className="flex items-center justify-center min-h-[400px] p-4">
                 {previewUrl ? (
                   <img src={previewUrl} alt={design.name} className="max-w-full max-h-[600px] rounded-lg object-contain" />
-                ) : design.svg ? (
-                  <div className="max-w-full" dangerouslySetInnerHTML={{ __html: design.svg }} />
+                ) : design.svg_url ? (
+                  <img src={design.svg_url} alt={design.name} className="max-w-full max-h-[600px] rounded-lg object-contain" />
                 ) : (
                   <div className="text-center py-16 text-sm" style={{ color: "#004999" }}>No preview available</div>
                 )}
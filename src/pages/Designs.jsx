@@ -1,31 +1,23 @@
-import { useEffect, useState, useMemo } from "react";
+import { useEffect, useState } from "react";
 import { useNavigate } from "react-router-dom";
-import { gownDesignsAPI } from "../utils/api.js";
+import { gownDesignsAPI, imageVariant } from "../utils/api.js";
+import usePagedList from "../utils/usePagedList.js";
 import toast from "react-hot-toast";
 
 export default function Designs() {
-  const [designs, setDesigns] = useState([]);
-  const [loading, setLoading] = useState(true);
   const [sort, setSort] = useState("newest");
   const [search, setSearch] = useState("");
   const [deleteId, setDeleteId] = useState(null);
   const navigate = useNavigate();
+  const {
+    items: designs, total, loading, loadingMore, hasMore, error, loadMore, removeItem,
+  } = usePagedList(gownDesignsAPI.getPage, "designs", { q: search, order: sort });
 
-  useEffect(() => { fetchDesigns(); }, []);
-
-  const fetchDesigns = async () => {
-    try {
-      setLoading(true);
-      const res = await gownDesignsAPI.getAll();
-      setDesigns(res.designs || []);
-    } catch (err) {
-      console.error("Failed to load designs", err);
-      setDesigns([]);
-      toast.error("Unable to load designs");
-    } finally {
-      setLoading(false);
-    }
-  };
+  useEffect(() => {
+    if (!error) return;
+    console.error("Failed to load designs", error);
+    toast.error("Unable to load designs");
+  }, [error]);
 
   const openDesign = (id) => navigate(`/designs/${id}`);
   const editDesign = (d) => navigate("/studio", { state: { design: d } });
@@ -34,7 +26,7 @@ export default function Designs() {
     if (!deleteId) return;
     try {
       await gownDesignsAPI.delete(deleteId);
-      setDesigns((s) => s.filter((x) => x.id !== deleteId));
+      removeItem(deleteId);
       toast.success("Design deleted");
     } catch {
       toast.error("Delete failed");
@@ -42,25 +34,13 @@ export default function Designs() {
     setDeleteId(null);
   };
 
-  const sortedDesigns = useMemo(() => {
-    const filtered = designs.filter((d) =>
-      d.name?.toLowerCase().includes(search.toLowerCase()) ||
-      d.prompt?.toLowerCase().includes(search.toLowerCase())
-    );
-    const arr = [...filtered];
-    if (sort === "newest") arr.sort((a, b) => new Date(b.created_at) - new Date(a.created_at));
-    else if (sort === "oldest") arr.sort((a, b) => new Date(a.created_at) - new Date(b.created_at));
-    else if (sort === "name") arr.sort((a, b) => a.name.localeCompare(b.name));
-    return arr;
-  }, [designs, sort, search]);
-
   return (
     <div className="h-full overflow-y-auto" style={{ background: "linear-gradient(180deg, rgba(135,206,235,0.95), rgba(173,216,230,0.9))", color: "#001a33" }}>
       <div className="mx-auto max-w-6xl px-4 py-8">
         <div className="flex flex-col sm:flex-row sm:items-center sm:justify-between gap-4 mb-6">
           <div>
             <h1 className="text-2xl font-bold tracking-tight">My Designs</h1>
-            <p className="text-sm mt-1" style={{ color: "#0066cc" }}>{designs.length} {designs.length === 1 ? "design" : "designs"} saved</p>
+            <p className="text-sm mt-1" style={{ color: "#0066cc" }}>{total} {total === 1 ? "design" : "designs"} saved</p>
           </div>
           <div className="flex items-center gap-3">
             <div className="relative">
@@ -79,7 +59,7 @@ export default function Designs() {
           <div className="flex items-center justify-center py-24">
             <div className="animate-pulse text-sm font-medium" style={{ color: "#004999" }}>Loading designs...</div>
           </div>
-        ) : sortedDesigns.length === 0 ? (
+        ) : designs.length === 0 ? (
           <div className="flex flex-col items-center justify-center py-20 text-center">
             <div className="text-5xl mb-4 opacity-20">&#x1F3F0;</div>
             <p className="text-lg font-medium" style={{ color: "#0066cc" }}>
@@ -96,7 +76,7 @@ export default function Designs() {
           </div>
         ) : (
           <div className="grid gap-4 sm:grid-cols-2 lg:grid-cols-3 xl:grid-cols-4">
-            {sortedDesigns.map((d) => (
+            {designs.map((d) => (
               <div
                 key={d.id}
                 className="group rounded-xl border shadow-sm hover:shadow-md transition-all duration-200 cursor-pointer hover:-translate-y-0.5 overflow-hidden"
@@ -105,9 +85,9 @@ export default function Designs() {
               >
                 <div className="h-36 flex items-center justify-center" style={{ background: "rgba(255,255,255,0.3)" }}>
                   {d.image_url ? (
-                    <img src={d.image_url} alt={d.name} className="w-full h-full object-contain p-2" />
-                  ) : d.thumbnail ? (
-                    <img src={`data:image/png;base64,${d.thumbnail}`} alt={d.name} className="w-full h-full object-contain p-2" />
+                    <img src={imageVariant(d.image_url, "thumb")} alt={d.name} loading="lazy" className="w-full h-full object-contain p-2" />
+                  ) : d.thumbnail_url ? (
+                    <img src={imageVariant(d.thumbnail_url, "thumb")} alt={d.name} loading="lazy" className="w-full h-full object-contain p-2" />
                   ) : (
                     <div className="text-4xl opacity-20">&#x1F457;</div>
                   )}
@@ -134,6 +114,14 @@ export default function Designs() {
             ))}
           </div>
         )}
+
+        {!loading && hasMore && (
+          <div className="flex justify-center mt-6">
+            <button onClick={loadMore} disabled={loadingMore} className="text-xs px-4 py-2 rounded-lg font-medium transition-all disabled:opacity-60" style={{ background: "rgba(255,255,255,0.5)", color: "#0066cc", border: "1px solid rgba(0,102,204,0.2)" }}>
+              {loadingMore ? "Loading..." : "Load more"}
+            </button>
+          </div>
+        )}
       </div>
 
       {deleteId && (
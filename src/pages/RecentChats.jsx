@@ -1,6 +1,7 @@
 import { useEffect, useState } from "react";
 import { useNavigate } from "react-router-dom";
 import { conversationsAPI } from "../utils/api.js";
+import usePagedList from "../utils/usePagedList.js";
 import toast from "react-hot-toast";
 
 function timeGroup(dateStr) {
@@ -26,23 +27,16 @@ function formatTime(dateStr) {
 }
 
 export default function RecentChats() {
-  const [chats, setChats] = useState([]);
   const [search, setSearch] = useState("");
   const [deleteId, setDeleteId] = useState(null);
   const navigate = useNavigate();
+  const {
+    items: chats, total, loadingMore, hasMore, error, loadMore, removeItem,
+  } = usePagedList(conversationsAPI.listPage, "conversations", { q: search });
 
   useEffect(() => {
-    fetchChats();
-  }, []);
-
-  const fetchChats = async () => {
-    try {
-      const response = await conversationsAPI.list();
-      setChats(response.conversations || []);
-    } catch (error) {
-      console.error("Failed to fetch conversations:", error);
-    }
-  };
+    if (error) console.error("Failed to fetch conversations:", error);
+  }, [error]);
 
   const openConversation = (convId) => {
     navigate(`/studio/${convId}`);
@@ -52,7 +46,7 @@ export default function RecentChats() {
     if (!deleteId) return;
     try {
       await conversationsAPI.delete(deleteId);
-      setChats((prev) => prev.filter((c) => c.id !== deleteId));
+      removeItem(deleteId);
       toast.success("Chat deleted");
     } catch {
       toast.error("Failed to delete");
@@ -60,12 +54,8 @@ export default function RecentChats() {
     setDeleteId(null);
   };
 
-  const filtered = chats.filter(
-    (c) => c.title?.toLowerCase().includes(search.toLowerCase())
-  );
-
   const grouped = {};
-  filtered.forEach((c) => {
+  chats.forEach((c) => {
     const g = timeGroup(c.created_at);
     if (!grouped[g]) grouped[g] = [];
     grouped[g].push(c);
@@ -80,7 +70,7 @@ export default function RecentChats() {
           <div>
             <h1 className="text-lg font-bold" style={{ color: "#001a33" }}>Recent Chats</h1>
             <p className="text-[11px] mt-0.5" style={{ color: "#94a3b8" }}>
-              {chats.length} {chats.length === 1 ? "conversation" : "conversations"}
+              {total} {total === 1 ? "conversation" : "conversations"}
             </p>
           </div>
           <button
@@ -114,7 +104,7 @@ export default function RecentChats() {
         </div>
 
         {/* Empty state */}
-        {filtered.length === 0 ? (
+        {chats.length === 0 ? (
           <div className="flex flex-col items-center justify-center py-16 text-center">
             <div className="w-12 h-12 rounded-xl flex items-center justify-center mb-3" style={{ background: "rgba(0,102,204,0.08)" }}>
               <svg className="w-5 h-5" style={{ color: "#0066cc" }} fill="none" stroke="currentColor" viewBox="0 0 24 24" strokeWidth="1.5">
@@ -194,6 +184,19 @@ export default function RecentChats() {
             );
           })
         )}
+
+        {hasMore && (
+          <div className="flex justify-center mt-2">
+            <button
+              onClick={loadMore}
+              disabled={loadingMore}
+              className="text-[11px] px-4 py-1.5 rounded-full font-medium transition-all disabled:opacity-60"
+              style={{ background: "#ffffff", color: "#0066cc", border: "1px solid rgba(0,0,0,0.08)" }}
+            >
+              {loadingMore ? "Loading..." : "Load more"}
+            </button>
+          </div>
+        )}
       </div>
 
       {/* Delete dialog */}
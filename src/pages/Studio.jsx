@@ -2,7 +2,7 @@ import { useRef, useState, useEffect, useMemo, useCallback } from "react";
 import { useLocation, useParams } from "react-router-dom";
 import { useAuth } from "../contexts/AuthContext.jsx";
 import CustomizerPanel from "../components/CustomizerPanel.jsx";
-import { conversationsAPI, aiAPI, stylesAPI, gownDesignsAPI } from "../utils/api.js";
+import { conversationsAPI, aiAPI, stylesAPI, gownDesignsAPI, imageVariant } from "../utils/api.js";
 import toast from "react-hot-toast";
 
 export default function Studio() {
@@ -12,6 +12,8 @@ export default function Studio() {
   const [prompt, setPrompt] = useState("");
   const [messages, setMessages] = useState([]);
   const [conversationId, setConversationId] = useState(null);
+  const [olderCursor, setOlderCursor] = useState(null);
+  const [loadingOlder, setLoadingOlder] = useState(false);
   const [isGenerating, setIsGenerating] = useState(false);
   const [isTyping, setIsTyping] = useState(false);
   const [models, setModels] = useState([]);
@@ -40,6 +42,7 @@ export default function Studio() {
   const [inputImagePreview, setInputImagePreview] = useState(null);
   const fileInputRef = useRef(null);
   const chatEndRef = useRef(null);
+  const skipScrollRef = useRef(false);
 
   const userInitials = user
     ? `${(user.first_name?.[0] || "").toUpperCase()}${(user.last_name?.[0] || "").toUpperCase()}`
@@ -120,9 +123,19 @@ export default function Studio() {
     }
   };
 
+  // The slash menu asks the server for matching styles instead of loading them all
   useEffect(() => {
-    stylesAPI.list().then((res) => setSavedStyles(res.styles || [])).catch(() => {});
+    if (!showSlashMenu) return;
+    let cancelled = false;
+    const timer = setTimeout(() => {
+      stylesAPI.listPage({ q: slashFilter, limit: 20 })
+        .then((res) => { if (!cancelled) setSavedStyles(res.styles || []); })
+        .catch(() => {});
+    }, 150);
+    return () => { cancelled = true; clearTimeout(timer); };
+  }, [showSlashMenu, slashFilter]);
 
+  useEffect(() => {
     aiAPI.listModels().then((res) => {
       const img = res.image_models || [];
       const txt = res.text_models || [];
@@ -172,18 +185,42 @@ export default function Studio() {
 
     if (convId && convId !== conversationId) {
       setConversationId(convId);
-      conversationsAPI.get(convId).then((res) => {
+      conversationsAPI.messages(convId).then((res) => {
         if (res.messages) {
           setMessages(res.messages);
+          setOlderCursor(res.older_cursor);
         }
       }).catch(() => toast.error("Failed to load conversation"));
     }
   }, [location, convId]);
 
   useEffect(() => {
+    if (skipScrollRef.current) {
+      skipScrollRef.current = false;
+      return;
+    }
     chatEndRef.current?.scrollIntoView({ behavior: "smooth" });
   }, [messages]);
 
+  const loadOlderMessages = async (e) => {
+    const el = e.currentTarget;
+    if (el.scrollTop > 40 || !olderCursor || loadingOlder || !conversationId) return;
+    setLoadingOlder(true);
+    try {
+      const res = await conversationsAPI.messages(conversationId, { before: olderCursor });
+      const previousHeight = el.scrollHeight;
+      skipScrollRef.current = true;
+      setMessages((prev) => [...(res.messages || []), ...prev]);
+      setOlderCursor(res.older_cursor);
+      // Keep the viewport on the message the user was reading
+      requestAnimationFrame(() => { el.scrollTop += el.scrollHeight - previousHeight; });
+    } catch {
+      toast.error("Failed to load older messages");
+    } finally {
+      setLoadingOlder(false);
+    }
+  };
+
   const toBase64 = (file) => new Promise((resolve, reject) => {
     const reader = new FileReader();
     reader.readAsDataURL(file);
@@ -213,12 +250,8 @@ export default function Studio() {
     setMessages((prev) => [...prev, userMsg]);
 
     try {
-      let inputImageData = null;
-      if (inputImage) {
-        inputImageData = await toBase64(inputImage);
-      }
-
       if (genMode === "text") {
+        const inputImageData = inputImage ? await toBase64(inputImage) : null;
         const response = await aiAPI.generateText(text, selectedModel, conversationId, inputImageData);
         if (response.text) {
           if (response.conversation_id && !conversationId) setConversationId(response.conversation_id);
@@ -238,7 +271,7 @@ export default function Studio() {
           sleeve_length: params.sleeveLength, train_length: params.trainLength,
           texture: params.texture, texture_intensity: params.textureIntensity,
           skirt_volume: params.skirtVolume, dress_type: params.dressType,
-        }, selectedModel, conversationId, inputImageData);
+        }, selectedModel, conversationId, inputImage);
 
         if (response.image) {
           if (response.conversation_id && !conversationId) setConversationId(response.conversation_id);
@@ -268,6 +301,7 @@ export default function Studio() {
   const resetChat = () => {
     setMessages([]);
     setConversationId(null);
+    setOlderCursor(null);
     setPrompt("");
   };
 
@@ -448,7 +482,7 @@ export default function Studio() {
           >
             {activeModels.map((m) => (
               <option key={m.id} value={m.id} disabled={m.requires_key && !m.key_configured}>
-                {m.name}{m.requires_key && !m.key_configured ? " (no key)" : ""}
+                {m.name}{m.requires_key && !m.key_configured ? " (no key)" : m.available === false ? " (down)" : ""}
               </option>
             ))}
           </select>
@@ -515,7 +549,7 @@ export default function Studio() {
         </div>
       )}
 
-      <div className="flex-1 overflow-y-auto px-4 py-3 space-y-3 min-h-0">
+      <div className="flex-1 overflow-y-auto px-4 py-3 space-y-3 min-h-0" onScroll={loadOlderMessages}>
         {messages.length === 0 ? (
           <div className="flex flex-col items-center justify-center h-full text-center py-10">
             <div className="w-12 h-12 rounded-xl flex items-center justify-center mb-3" style={{ background: "linear-gradient(135deg, rgba(0,102,204,0.1), rgba(0,153,255,0.05))", border: "1px solid rgba(0,102,204,0.1)" }}>
@@ -535,6 +569,9 @@ export default function Studio() {
           </div>
         ) : (
           <>
+            {loadingOlder && (
+              <p className="text-[11px] text-center" style={{ color: "#004999" }}>Loading earlier messages...</p>
+            )}
             {messages.map((msg) => (
               <div key={msg.id} className={`flex gap-2.5 ${msg.sender_role === "user" ? "justify-end" : "justify-start"}`}>
                 {msg.sender_role !== "user" && (
@@ -561,7 +598,7 @@ export default function Studio() {
                     {msg.sender_role === "user" ? (
                       <div>
                         {msg.image_url && (
-                          <img src={msg.image_url} alt="Your upload" className="w-16 h-16 rounded-lg object-cover mb-1.5" />
+                          <img src={imageVariant(msg.image_url, "thumb")} alt="Your upload" className="w-16 h-16 rounded-lg object-cover mb-1.5" />
                         )}
                         <p className="text-xs whitespace-pre-wrap leading-relaxed">{msg.content}</p>
                       </div>
@@ -570,7 +607,7 @@ export default function Studio() {
                         {msg.image_url ? (
                           <div className="relative group cursor-pointer" onClick={() => downloadImage(msg.image_url)}>
                             <img
-                              src={msg.image_url}
+                              src={imageVariant(msg.image_url, "medium")}
                               alt="Generated design"
                               className="w-full rounded-xl object-cover"
                               style={{ maxHeight: "240px", boxShadow: "0 2px 12px rgba(0,0,0,0.08)" }}
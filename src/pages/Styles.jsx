@@ -1,31 +1,26 @@
-import { useEffect, useState, useMemo } from "react";
+import { useEffect, useState } from "react";
 import { useNavigate } from "react-router-dom";
 import { stylesAPI } from "../utils/api.js";
+import usePagedList from "../utils/usePagedList.js";
 import toast from "react-hot-toast";
 
 export default function Styles() {
-  const [styles, setStyles] = useState([]);
-  const [loading, setLoading] = useState(true);
   const [sort, setSort] = useState("newest");
   const [search, setSearch] = useState("");
   const [category, setCategory] = useState("all");
   const [deleteId, setDeleteId] = useState(null);
   const navigate = useNavigate();
+  const {
+    items: styles, total, loading, loadingMore, hasMore, error, loadMore, removeItem,
+  } = usePagedList(stylesAPI.listPage, "styles", {
+    q: search,
+    order: sort,
+    category: category === "all" ? undefined : category,
+  });
 
-  useEffect(() => { fetchStyles(); }, []);
-
-  const fetchStyles = async () => {
-    try {
-      setLoading(true);
-      const res = await stylesAPI.list();
-      setStyles(res.styles || []);
-    } catch {
-      setStyles([]);
-      toast.error("Unable to load styles");
-    } finally {
-      setLoading(false);
-    }
-  };
+  useEffect(() => {
+    if (error) toast.error("Unable to load styles");
+  }, [error]);
 
   const applyStyle = (style) => navigate("/studio", { state: { style } });
 
@@ -33,7 +28,7 @@ export default function Styles() {
     if (!deleteId) return;
     try {
       await stylesAPI.delete(deleteId);
-      setStyles((s) => s.filter((x) => x.id !== deleteId));
+      removeItem(deleteId);
       toast.success("Style deleted");
     } catch {
       toast.error("Delete failed");
@@ -41,18 +36,6 @@ export default function Styles() {
     setDeleteId(null);
   };
 
-  const sortedStyles = useMemo(() => {
-    const filtered = styles.filter((s) =>
-      s.name?.toLowerCase().includes(search.toLowerCase()) &&
-      (category === "all" || s.category === category)
-    );
-    const arr = [...filtered];
-    if (sort === "newest") arr.sort((a, b) => new Date(b.created_at) - new Date(a.created_at));
-    else if (sort === "oldest") arr.sort((a, b) => new Date(a.created_at) - new Date(b.created_at));
-    else if (sort === "name") arr.sort((a, b) => a.name.localeCompare(b.name));
-    return arr;
-  }, [styles, sort, search, category]);
-
   return (
     <div className="h-full overflow-y-auto" style={{ background: "#f0f4f8" }}>
       <div className="mx-auto max-w-5xl px-4 py-6">
@@ -61,7 +44,7 @@ export default function Styles() {
           <div>
             <h1 className="text-lg font-bold" style={{ color: "#001a33" }}>Saved Styles</h1>
             <p className="text-[11px] mt-0.5" style={{ color: "#94a3b8" }}>
-              {styles.length} {styles.length === 1 ? "style" : "styles"} saved
+              {total} {total === 1 ? "style" : "styles"} saved
             </p>
           </div>
           <div className="flex items-center gap-2">
@@ -119,7 +102,7 @@ export default function Styles() {
           <div className="flex items-center justify-center py-20">
             <p className="text-xs" style={{ color: "#94a3b8" }}>Loading...</p>
           </div>
-        ) : sortedStyles.length === 0 ? (
+        ) : styles.length === 0 ? (
           <div className="flex flex-col items-center justify-center py-16 text-center">
             <div className="w-12 h-12 rounded-xl flex items-center justify-center mb-3" style={{ background: "rgba(0,102,204,0.08)" }}>
               <svg className="w-5 h-5" style={{ color: "#0066cc" }} fill="none" stroke="currentColor" viewBox="0 0 24 24" strokeWidth="1.5">
@@ -144,7 +127,7 @@ export default function Styles() {
           </div>
         ) : (
           <div className="grid gap-2 sm:grid-cols-2 lg:grid-cols-3">
-            {sortedStyles.map((s) => (
+            {styles.map((s) => (
               <div
                 key={s.id}
                 className="group rounded-xl cursor-pointer transition-all hover:shadow-sm"
@@ -186,6 +169,19 @@ export default function Styles() {
             ))}
           </div>
         )}
+
+        {!loading && hasMore && (
+          <div className="flex justify-center mt-5">
+            <button
+              onClick={loadMore}
+              disabled={loadingMore}
+              className="text-[11px] px-4 py-1.5 rounded-full font-medium transition-all disabled:opacity-60"
+              style={{ background: "#ffffff", color: "#0066cc", border: "1px solid rgba(0,0,0,0.08)" }}
+            >
+              {loadingMore ? "Loading..." : "Load more"}
+            </button>
+          </div>
+        )}
       </div>
 
       {/* Delete dialog */}
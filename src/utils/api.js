@@ -12,12 +12,14 @@ class ApiError extends Error {
 const apiRequest = async (endpoint, options = {}) => {
   const url = `${API_BASE_URL}${endpoint}`;
 
+  // FormData bodies set their own multipart Content-Type (with boundary)
+  const isForm = options.body instanceof FormData;
   const config = {
+    ...options,
     headers: {
-      "Content-Type": "application/json",
+      ...(isForm ? {} : { "Content-Type": "application/json" }),
       ...options.headers,
     },
-    ...options,
   };
 
   // Add JWT token if available
@@ -43,6 +45,27 @@ const apiRequest = async (endpoint, options = {}) => {
   }
 };
 
+// List endpoints return one keyset page plus next_cursor. `q` searches and
+// `order` sorts server side; `total` asks for the account's row count.
+const withPage = (endpoint, { cursor, limit, q, order, category, total } = {}) => {
+  const query = new URLSearchParams();
+  if (limit) query.set("limit", String(limit));
+  if (cursor) query.set("cursor", cursor);
+  if (q?.trim()) query.set("q", q.trim());
+  if (order) query.set("order", order);
+  if (category) query.set("category", category);
+  if (total) query.set("total", "1");
+  const qs = query.toString();
+  return qs ? `${endpoint}?${qs}` : endpoint;
+};
+
+// Uploaded images can be fetched downsized: size is "thumb" (200px) or
+// "medium" (640px). Other URLs (data:, external) are returned unchanged.
+export const imageVariant = (url, size) => {
+  if (!url || !url.includes("/api/uploads/")) return url;
+  return `${url}${url.includes("?") ? "&" : "?"}size=${size}`;
+};
+
 export const authAPI = {
   signup: (userData) =>
     apiRequest("/auth/signup", {
@@ -77,6 +100,7 @@ export const accountsAPI = {
 
 export const gownDesignsAPI = {
   getAll: () => apiRequest("/gown-designs"),
+  getPage: (page) => apiRequest(withPage("/gown-designs", page)),
 
   create: (designData) =>
     apiRequest("/gown-designs", {
@@ -100,6 +124,7 @@ export const gownDesignsAPI = {
 
 export const designsAPI = {
   getAll: () => apiRequest("/designs"),
+  getPage: (page) => apiRequest(withPage("/designs", page)),
 
   create: (designData) =>
     apiRequest("/designs", {
@@ -199,11 +224,19 @@ export const profilesAPI = {
 export const aiAPI = {
   listModels: () => apiRequest("/ai/models"),
 
-  generateImage: (prompt, params, model, conversation_id, input_image) =>
-    apiRequest("/ai/generate-image", {
+  generateImage: (prompt, params, model, conversation_id, input_image) => {
+    // Image files go up as a multipart part instead of a base64 string in JSON
+    if (input_image instanceof Blob) {
+      const form = new FormData();
+      form.append("json", JSON.stringify({ prompt, params, model, conversation_id }));
+      form.append("input_image", input_image, input_image.name || "input.png");
+      return apiRequest("/ai/generate-image", { method: "POST", body: form });
+    }
+    return apiRequest("/ai/generate-image", {
       method: "POST",
       body: JSON.stringify({ prompt, params, model, conversation_id, input_image }),
-    }),
+    });
+  },
 
   generateText: (prompt, model, conversation_id, input_image) =>
     apiRequest("/ai/generate-text", {
@@ -214,12 +247,20 @@ export const aiAPI = {
 
 export const conversationsAPI = {
   list: () => apiRequest("/conversations"),
+  listPage: (page) => apiRequest(withPage("/conversations", page)),
   get: (id) => apiRequest(`/conversations/${id}`),
+  messages: (id, { before, after, limit = 50 } = {}) => {
+    const query = new URLSearchParams({ limit: String(limit) });
+    if (before) query.set("before", before);
+    if (after) query.set("after", after);
+    return apiRequest(`/conversations/${id}/messages?${query}`);
+  },
   delete: (id) => apiRequest(`/conversations/${id}`, { method: "DELETE" }),
 };
 
 export const stylesAPI = {
   list: () => apiRequest("/styles"),
+  listPage: (page) => apiRequest(withPage("/styles", page)),
   create: (data) =>
     apiRequest("/styles", { method: "POST", body: JSON.stringify(data) }),
   delete: (id) => apiRequest(`/styles/${id}`, { method: "DELETE" }),
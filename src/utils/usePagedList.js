@@ -0,0 +1,67 @@
+import { useCallback, useEffect, useRef, useState } from "react";
+
+// Keyset-paged list state for the library pages. `fetchPage(params)` is one of
+// the api.js page helpers and resolves to `{ [key]: rows, next_cursor, total }`.
+// Changing `params` (search, order, filter) reloads from the first page, so
+// search runs on the server instead of over rows already downloaded.
+export default function usePagedList(fetchPage, key, params = {}) {
+  const [items, setItems] = useState([]);
+  const [total, setTotal] = useState(0);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [error, setError] = useState(null);
+  const generation = useRef(0);
+  const firstLoad = useRef(true);
+  const paramsKey = JSON.stringify(params);
+
+  useEffect(() => {
+    const current = ++generation.current;
+    // Debounce typing in the search box; the first page loads immediately
+    const delay = firstLoad.current ? 0 : 250;
+    firstLoad.current = false;
+    const timer = setTimeout(async () => {
+      setLoading(true);
+      setLoadingMore(false);
+      setError(null);
+      try {
+        const page = await fetchPage({ ...JSON.parse(paramsKey), total: true });
+        if (current !== generation.current) return;
+        setItems(page[key] || []);
+        setNextCursor(page.next_cursor || null);
+        setTotal(page.total ?? (page[key] || []).length);
+      } catch (err) {
+        if (current !== generation.current) return;
+        setItems([]);
+        setNextCursor(null);
+        setError(err);
+      } finally {
+        if (current === generation.current) setLoading(false);
+      }
+    }, delay);
+    return () => clearTimeout(timer);
+  }, [fetchPage, key, paramsKey]);
+
+  const loadMore = useCallback(async () => {
+    if (!nextCursor || loadingMore) return;
+    const current = generation.current;
+    setLoadingMore(true);
+    try {
+      const page = await fetchPage({ ...JSON.parse(paramsKey), cursor: nextCursor });
+      if (current !== generation.current) return;
+      setItems((prev) => [...prev, ...(page[key] || [])]);
+      setNextCursor(page.next_cursor || null);
+    } catch (err) {
+      if (current === generation.current) setError(err);
+    } finally {
+      if (current === generation.current) setLoadingMore(false);
+    }
+  }, [fetchPage, key, paramsKey, nextCursor, loadingMore]);
+
+  const removeItem = useCallback((id) => {
+    setItems((prev) => prev.filter((item) => item.id !== id));
+    setTotal((n) => Math.max(0, n - 1));
+  }, []);
+
+  return { items, total, loading, loadingMore, hasMore: Boolean(nextCursor), error, loadMore, removeItem };
+}